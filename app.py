@@ -12,12 +12,49 @@ def create_app():
     app.config.from_object(Config)
 
     app.config['UPLOAD_FOLDER'] = 'static/uploads'
-    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB per request; larger media arrive in chunks
 
     db.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
 
+    # JSON logs with a request ID on every line and one line per request
+    import request_log
+    request_log.init_app(app)
+
+    # Sampled OTLP/JSON tracing spans around gameplay phases (logs/traces.jsonl)
+    import tracing
+    tracing.init_app(app)
+
+    # Per-request SQL statement counts and timings (registered first so every
+    # other hook's queries are counted)
+    import instrumentation
+    instrumentation.init_app(app)
+
+    # Slow requests and statements → logs/slow.log (Admin → Slow Log)
+    import slow_log
+    slow_log.init_app(app)
+
+    # Admin-triggered cProfile / sampling profiler (Admin → Profiling)
+    import profiling
+    profiling.init_app(app)
+
+    # Per-request peak RSS and admin-triggered tracemalloc snapshots (Admin → Memory)
+    import memory
+    memory.init_app(app)
+
+    # /healthz and /readyz for the load balancer
+    import health
+    health.init_app(app)
+
+    # Template/mapper/pool/cache warm-up, run per worker by gunicorn.conf.py
+    import warmup
+    warmup.init_app(app)
+
+    # Prometheus /metrics (latency histograms, in-flight requests, game counters)
+    import metrics
+    metrics.init_app(app)
+
     # Create upload folder if it doesn't exist
     os.makedirs(os.path.join(app.root_path, 'static/uploads'), exist_ok=True)
 
@@ -60,6 +97,31 @@ def create_app():
                 current_user.is_online = True
                 db.session.commit()
 
+    # Uploads may belong to questions a team has not reached yet. Players get
+    # signed /media/ links (routes/media.py); only admins may browse them here.
+    @app.before_request
+    def protect_uploads():
+        from flask import abort, request
+        from flask_login import current_user
+        if (request.endpoint == 'static'
+                and request.view_args.get('filename', '').startswith('uploads/')
+                and not (current_user.is_authenticated and current_user.is_admin)):
+            abort(404)
+
+    # Content-addressed uploads never change under the same URL — cache them for a year
+    @app.after_request
+    def cache_immutable_uploads(response):
+        from flask import request
+        from media import is_immutable
+        if (request.endpoint == 'static'
+                and response.status_code in (200, 206, 304)
+                and is_immutable(request.view_args.get('filename', ''))):
+            response.cache_control.private = True
+            response.cache_control.max_age = 365 * 24 * 3600
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
     # On startup, clear all is_online flags — any prior sessions are now invalid
     with app.app_context():
         try:
@@ -70,19 +132,30 @@ def create_app():
             db.session.rollback()
 
     # Register CLI commands
-    from commands import user_cli
+    from commands import media_cli, user_cli
     app.register_blueprint(user_cli)
+    app.register_blueprint(media_cli)
+
+    # Background job runner (`flask jobs work`)
+    from jobs import jobs_cli
+    app.register_blueprint(jobs_cli)
+
+    # Fingerprinted static bundle (also registers `flask assets build`)
+    import assets
+    assets.init_app(app)
 
     # Register blueprints
     from routes.auth import auth_bp
     from routes.admin import admin_bp
     from routes.game import game_bp
     from routes.public import public_bp
+    from routes.media import media_bp
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(game_bp, url_prefix='/game')
     app.register_blueprint(public_bp)
+    app.register_blueprint(media_bp, url_prefix='/media')
 
     return app
 
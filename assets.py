@@ -0,0 +1,205 @@
+"""Self-hosted, fingerprinted front-end assets.
+
+``flask assets build`` vendors Bootstrap, Bootstrap Icons, jQuery and hls.js
+into ``static/vendor`` (downloaded once, then reused), minifies them together
+with our own CSS/JS, writes content-hashed copies to ``static/dist`` alongside
+``.gz`` (and ``.br`` when the Brotli package is installed) variants, and
+records the mapping in ``static/dist/manifest.json``.
+
+Templates call ``asset_url('css/style.css')``. With a manifest present that
+returns the hashed URL, served from ``/static/dist`` with a one-year immutable
+cache and the best precompressed variant the client accepts. Without a build
+it falls back to the plain static file, or the CDN for vendor assets, so a
+fresh checkout still works.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import urllib.request
+
+import click
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # optional — gzip variants are always written
+    brotli = None
+
+DIST_DIR = 'dist'
+VENDOR_DIR = 'vendor'
+MANIFEST = 'manifest.json'
+ONE_YEAR = 365 * 24 * 3600
+
+# Logical name → upstream URL. Also used as the fallback before a build.
+VENDOR_ASSETS = {
+    'vendor/bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'vendor/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'vendor/jquery.min.js': 'https://code.jquery.com/jquery-3.7.0.min.js',
+    'vendor/bootstrap-icons.css': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/bootstrap-icons.css',
+    'vendor/hls.min.js': 'https://cdn.jsdelivr.net/npm/hls.js@1.5.17/dist/hls.min.js',
+    # Referenced from bootstrap-icons.css as ./fonts/…; copied unhashed next to it.
+    'vendor/fonts/bootstrap-icons.woff2': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/fonts/bootstrap-icons.woff2',
+    'vendor/fonts/bootstrap-icons.woff': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/fonts/bootstrap-icons.woff',
+}
+
+# Files that get fingerprinted, in static/-relative logical names.
+BUNDLE = [
+    'vendor/bootstrap.min.css',
+    'vendor/bootstrap-icons.css',
+    'vendor/bootstrap.bundle.min.js',
+    'vendor/jquery.min.js',
+    'vendor/hls.min.js',
+    'css/style.css',
+    'css/admin.css',
+    'js/main.js',
+    'js/admin.js',
+]
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json')
+
+assets_bp = Blueprint('assets', __name__, cli_group='assets')
+_manifest = {}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Minification — deliberately conservative; vendor files are already minified
+# ─────────────────────────────────────────────────────────────────────────────
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.DOTALL)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """Whitespace-only: drop indentation and blank lines, keep every token."""
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Build
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _fetch_vendor(static_root, log):
+    for name, url in VENDOR_ASSETS.items():
+        path = os.path.join(static_root, name)
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        log(f'Downloading {url}')
+        with urllib.request.urlopen(url, timeout=30) as resp, open(path, 'wb') as out:
+            shutil.copyfileobj(resp, out)
+
+
+def _write_compressed(path, data):
+    with open(path + '.gz', 'wb') as out:
+        out.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as out:
+            out.write(brotli.compress(data, quality=11))
+
+
+def build(static_root, log=print):
+    """Vendor, minify, fingerprint and precompress the bundle; returns the manifest."""
+    _fetch_vendor(static_root, log)
+
+    dist_root = os.path.join(static_root, DIST_DIR)
+    shutil.rmtree(dist_root, ignore_errors=True)
+    os.makedirs(dist_root)
+
+    manifest = {}
+    for name in BUNDLE:
+        with open(os.path.join(static_root, name), 'rb') as f:
+            data = f.read()
+        if not name.endswith('.min.css') and name.endswith('.css'):
+            data = minify_css(data.decode('utf-8')).encode('utf-8')
+        elif not name.endswith('.min.js') and name.endswith('.js'):
+            data = minify_js(data.decode('utf-8')).encode('utf-8')
+
+        stem, ext = os.path.splitext(name)
+        hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+        out_path = os.path.join(dist_root, hashed)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, 'wb') as out:
+            out.write(data)
+        if ext in COMPRESSIBLE:
+            _write_compressed(out_path, data)
+        manifest[name] = hashed
+        log(f'  {name} → {DIST_DIR}/{hashed}')
+
+    # Fonts keep their names: bootstrap-icons.css already versions them via ?query.
+    fonts_src = os.path.join(static_root, VENDOR_DIR, 'fonts')
+    shutil.copytree(fonts_src, os.path.join(dist_root, VENDOR_DIR, 'fonts'))
+
+    with open(os.path.join(dist_root, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+@assets_bp.cli.command('build')
+def build_command():
+    """Vendor, minify, fingerprint and precompress front-end assets."""
+    manifest = build(current_app.static_folder, log=click.echo)
+    click.echo(click.style(f'{len(manifest)} asset(s) written to static/{DIST_DIR}.', fg='green'))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Runtime
+# ─────────────────────────────────────────────────────────────────────────────
+
+def load_manifest(static_root):
+    path = os.path.join(static_root, DIST_DIR, MANIFEST)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(name):
+    """URL for a bundled asset: fingerprinted when built, otherwise the source."""
+    hashed = _manifest.get(name)
+    if hashed:
+        return url_for('assets.dist', filename=hashed)
+    if name in VENDOR_ASSETS:
+        return VENDOR_ASSETS[name]
+    return url_for('static', filename=name)
+
+
+@assets_bp.route('/static/dist/<path:filename>')
+def dist(filename):
+    """Serve a fingerprinted file, preferring a precompressed variant."""
+    dist_root = os.path.join(current_app.static_folder, DIST_DIR)
+    accepted = request.accept_encodings
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[encoding] and os.path.isfile(os.path.join(dist_root, filename + suffix)):
+            response = send_from_directory(dist_root, filename + suffix, max_age=ONE_YEAR)
+            response.headers['Content-Encoding'] = encoding
+            response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            break
+    else:
+        response = send_from_directory(dist_root, filename, max_age=ONE_YEAR)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@assets_bp.route('/sw.js')
+def service_worker():
+    """Service worker (static/js/sw.js), served from the root so it controls every page."""
+    response = send_from_directory(os.path.join(current_app.static_folder, 'js'), 'sw.js', max_age=0)
+    response.cache_control.no_cache = True
+    return response
+
+
+def init_app(app):
+    global _manifest
+    _manifest = load_manifest(app.static_folder)
+    app.register_blueprint(assets_bp)
+    app.add_template_global(asset_url)
@@ -0,0 +1,169 @@
+"""Per-worker, read-only snapshot of the question catalog for the play path.
+
+Questions, clues and media hardly change once a game is running, so each
+worker keeps an immutable copy in memory and the play routes look questions
+up in dictionaries instead of querying MariaDB on every render.
+
+The snapshot is tagged with ``GameConfig.catalog_version``. Admin routes that
+change questions, clues or media call :func:`bump_catalog_version` before
+committing; every worker notices the new number on its next play request
+(the play routes already load GameConfig) and rebuilds its copy.
+"""
+import threading
+
+from app import db
+
+_lock = threading.Lock()
+_catalog = None
+
+
+class ClueRecord:
+    __slots__ = ('id', 'question_id', 'clue_text', 'clue_order', 'explanation')
+
+    def __init__(self, clue):
+        self.id = clue.id
+        self.question_id = clue.question_id
+        self.clue_text = clue.clue_text
+        self.clue_order = clue.clue_order
+        self.explanation = clue.explanation
+
+
+class MediaRecord:
+    __slots__ = (
+        'id', 'question_id', 'media_type', 'media_url', 'media_caption',
+        'width', 'height', 'variants', 'display_order',
+    )
+
+    def __init__(self, media):
+        self.id = media.id
+        self.question_id = media.question_id
+        self.media_type = media.media_type
+        self.media_url = media.media_url
+        self.media_caption = media.media_caption
+        self.width = media.width
+        self.height = media.height
+        self.variants = media.variants
+        self.display_order = media.display_order
+
+
+class QuestionRecord:
+    """Frozen copy of a Question with its clues and media pre-sorted.
+
+    Attribute names mirror the model so templates render either one.
+    """
+    __slots__ = (
+        'id', 'level_id', 'level_number', 'question_number', 'question_type',
+        'question_text', 'question_html', 'media_url', 'media_width', 'media_height',
+        'media_variants', 'answer', 'explanation', 'explanation_html', 'points',
+        'clues', 'media_files',
+    )
+
+    def __init__(self, question, level_number, clues, media_files):
+        self.id = question.id
+        self.level_id = question.level_id
+        self.level_number = level_number
+        self.question_number = question.question_number
+        self.question_type = question.question_type
+        self.question_text = question.question_text
+        self.question_html = question.question_html
+        self.media_url = question.media_url
+        self.media_width = question.media_width
+        self.media_height = question.media_height
+        self.media_variants = question.media_variants
+        self.answer = question.answer
+        self.explanation = question.explanation
+        self.explanation_html = question.explanation_html
+        self.points = question.points
+        self.clues = tuple(sorted(clues, key=lambda c: c.clue_order))
+        self.media_files = tuple(sorted(media_files, key=lambda m: m.display_order or 0))
+
+
+class Catalog:
+    """Questions indexed by ``(level_number, question_number)`` and by id."""
+    __slots__ = ('version', 'by_position', 'by_id', 'level_sizes')
+
+    def __init__(self, version, questions):
+        self.version = version
+        self.by_position = {(q.level_number, q.question_number): q for q in questions}
+        self.by_id = {q.id: q for q in questions}
+        sizes = {}
+        for q in questions:
+            sizes[q.level_number] = sizes.get(q.level_number, 0) + 1
+        self.level_sizes = sizes
+
+    def question(self, level_number, question_number):
+        return self.by_position.get((level_number, question_number))
+
+    def get(self, question_id):
+        return self.by_id.get(question_id)
+
+    def level_size(self, level_number):
+        """Number of questions in a level (0 if the level has none)."""
+        return self.level_sizes.get(level_number, 0)
+
+    def first_in_level(self, level_number):
+        numbers = [n for (lvl, n) in self.by_position if lvl == level_number]
+        return self.by_position[(level_number, min(numbers))] if numbers else None
+
+
+def build_catalog(version):
+    """Load every assigned question, clue and media row (four queries)."""
+    from models import Clue, Level, Question, QuestionMedia
+
+    level_numbers = dict(db.session.query(Level.id, Level.level_number).all())
+
+    clues_by_question = {}
+    for clue in Clue.query.all():
+        clues_by_question.setdefault(clue.question_id, []).append(ClueRecord(clue))
+
+    media_by_question = {}
+    for media in QuestionMedia.query.all():
+        media_by_question.setdefault(media.question_id, []).append(MediaRecord(media))
+
+    records = [
+        QuestionRecord(
+            q,
+            level_numbers[q.level_id],
+            clues_by_question.get(q.id, ()),
+            media_by_question.get(q.id, ()),
+        )
+        for q in Question.query.filter(Question.level_id.isnot(None)).all()
+        if q.level_id in level_numbers
+    ]
+    return Catalog(version, records)
+
+
+def get_catalog(config):
+    """Return this worker's snapshot, rebuilding it if `config` has moved on.
+
+    Returns None when no game is running — callers then fall back to queries,
+    which keeps admin previews and pre-game setup reading live data.
+    """
+    global _catalog
+    if not config or not config.game_started:
+        return None
+
+    version = config.catalog_version or 0
+    current = _catalog
+    if current is not None and current.version == version:
+        return current
+
+    with _lock:
+        if _catalog is None or _catalog.version != version:
+            _catalog = build_catalog(version)
+        return _catalog
+
+
+def loaded_version():
+    """Version of this worker's snapshot, or None before the first build."""
+    current = _catalog
+    return current.version if current is not None else None
+
+
+def bump_catalog_version():
+    """Invalidate every worker's snapshot; call before committing an edit."""
+    from models import GameConfig
+    GameConfig.query.update(
+        {GameConfig.catalog_version: db.func.coalesce(GameConfig.catalog_version, 0) + 1},
+        synchronize_session=False,
+    )
@@ -1,9 +1,10 @@
-"""Flask CLI commands — run with `flask user <command>`."""
+"""Flask CLI commands — run with `flask user <command>` or `flask media <command>`."""
 import click
 from flask import Blueprint
 from flask.cli import with_appcontext
 
 user_cli = Blueprint('user', __name__, cli_group='user')
+media_cli = Blueprint('media_cli', __name__, cli_group='media')
 
 
 @user_cli.cli.command('list')
@@ -135,3 +136,49 @@ def deactivate(username):
     user.session_token = None
     db.session.commit()
     click.echo(click.style(f'"{username}" has been deactivated.', fg='yellow'))
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+@media_cli.cli.command('gc')
+@click.option('--grace-hours', default=24.0, show_default=True,
+              help='Ignore files modified more recently than this.')
+@click.option('--quarantine', 'action', flag_value='quarantine',
+              help='Move orphans to uploads/.quarantine/<timestamp>/.')
+@click.option('--delete', 'action', flag_value='delete', help='Delete orphans permanently.')
+@click.option('--verbose', '-v', is_flag=True, help='List every orphaned file.')
+@with_appcontext
+def collect_garbage(grace_hours, action, verbose):
+    """Find uploaded files no question uses any more (report only by default)."""
+    import time
+    from media import find_orphans, quarantine
+    from storage import get_storage
+
+    batch = time.strftime('%Y%m%d-%H%M%S')
+    storage = get_storage()
+    count = total = 0
+    for key, size, _ in find_orphans(grace_hours * 3600):
+        if verbose:
+            click.echo(f'{_format_bytes(size):>10}  {key}')
+        if action == 'quarantine':
+            quarantine(key, batch)
+        elif action == 'delete':
+            storage.delete(key)
+        count += 1
+        total += size
+
+    if not count:
+        click.echo('No orphaned uploads found.')
+    elif action == 'quarantine':
+        click.echo(click.style(
+            f'Moved {count} file(s), {_format_bytes(total)}, to uploads/.quarantine/{batch}/.', fg='yellow'))
+    elif action == 'delete':
+        click.echo(click.style(f'Deleted {count} file(s), reclaiming {_format_bytes(total)}.', fg='green'))
+    else:
+        click.echo(f'{count} orphaned file(s), {_format_bytes(total)} reclaimable. '
+                   'Re-run with --quarantine or --delete to remove them.')
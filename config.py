@@ -27,3 +27,75 @@ class Config:
         f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Media delivery (routes/media.py): hand file transfers to the web server.
+    # MEDIA_ACCEL_REDIRECT is an nginx `internal` location aliased to static/,
+    # e.g. /_protected_media/. USE_X_SENDFILE is for Apache/lighttpd.
+    MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT') or None
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', '0') == '1'
+    # Signed media links are valid for one to two windows of this many seconds.
+    MEDIA_URL_TTL = int(os.environ.get('MEDIA_URL_TTL', 3600))
+    # Let the play page fetch the next question's media ahead of time. Off by
+    # default: the files reach the team's browser (and dev tools) before they
+    # solve the current question, so only enable it for hunts whose media
+    # gives nothing away.
+    PREFETCH_NEXT_MEDIA = os.environ.get('PREFETCH_NEXT_MEDIA', '0') == '1'
+
+    # Resumable uploads (routes/admin/uploads.py): each chunk is its own request,
+    # so chunks must stay below MAX_CONTENT_LENGTH and nginx client_max_body_size.
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+    MAX_UPLOAD_SIZE = int(os.environ.get('MAX_UPLOAD_SIZE', 2 * 1024 * 1024 * 1024))
+
+    # Add X-DB-Statements/X-DB-Time/Server-Timing headers to every response
+    # (always on in debug mode; see instrumentation.py).
+    SQL_STATS_HEADERS = os.environ.get('SQL_STATS_HEADERS', '0') == '1'
+
+    # Requests and SQL statements slower than these (milliseconds) are written
+    # to SLOW_LOG_PATH and shown under Admin → Slow Log (slow_log.py). 0 disables.
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 100))
+    SLOW_LOG_PATH = os.environ.get('SLOW_LOG_PATH') or None  # default: logs/slow.log
+
+    # Where Admin → Profiling keeps its control file and captured profiles
+    # (profiling.py). Default: logs/profiles.
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'profiles')
+
+    # Application logs on stderr (request_log.py): 'json' (one object per line,
+    # with request ID, user, team, latency and DB time) or 'text'.
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+    # Fraction of requests traced phase by phase (tracing.py), e.g. 0.05; 0 is off.
+    # Traces go to TRACE_FILE (default logs/traces.jsonl) or, with
+    # TRACE_EXPORT=memory, to a per-worker buffer of TRACE_BUFFER_SIZE traces.
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0))
+    TRACE_EXPORT = os.environ.get('TRACE_EXPORT', 'file')
+    TRACE_FILE = os.environ.get('TRACE_FILE') or None
+    TRACE_BUFFER_SIZE = int(os.environ.get('TRACE_BUFFER_SIZE', 1000))
+
+    # /readyz (health.py): seconds to wait for the database, job queue lag (s)
+    # that counts as a warning, and how long one result is reused per worker.
+    READY_DB_TIMEOUT = float(os.environ.get('READY_DB_TIMEOUT', 1.0))
+    READY_JOB_LAG = int(os.environ.get('READY_JOB_LAG', 300))
+    READY_CACHE_SECONDS = float(os.environ.get('READY_CACHE_SECONDS', 2.0))
+
+    # Pool connections each gunicorn worker opens before taking traffic
+    # (warmup.py; capped at the pool size). WARMUP=0 skips the warm-up.
+    WARMUP_CONNECTIONS = int(os.environ.get('WARMUP_CONNECTIONS', 2))
+
+    # Require `Authorization: Bearer <token>` on /metrics scrapes (metrics.py).
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+    # Public home/CMS pages are cached per worker for anonymous visitors
+    # (page_cache.py); edits show up everywhere within this many seconds. 0 disables.
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 30))
+
+    # Where uploads are kept (storage.py): 'local' (static/uploads on this
+    # machine) or 's3' for any S3-compatible bucket shared by several app nodes.
+    MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE', 'local')
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_PREFIX = os.environ.get('S3_PREFIX', '')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None  # e.g. http://minio:9000
+    S3_REGION = os.environ.get('S3_REGION') or None
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID') or None
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY') or None
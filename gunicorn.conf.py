@@ -0,0 +1,36 @@
+"""Gunicorn server hooks (loaded automatically from the working directory).
+
+Command-line options in the systemd unit still decide workers and binding;
+this file only prepares shared state for the workers and warms each one up.
+"""
+import os
+import shutil
+import tempfile
+
+# Metrics (metrics.py): every worker writes its counters to files here and a
+# scrape sums them. Set before workers import the app so prometheus_client
+# starts in multiprocess mode.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'treasure-hunt-metrics'),
+)
+
+
+def on_starting(server):
+    # Counters restart from zero with the server; stale files would double-count.
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def post_worker_init(worker):
+    # Runs in each new worker before it accepts connections (warmup.py).
+    if os.environ.get('WARMUP', '1') != '0':
+        from warmup import warm_up
+        warm_up(worker.wsgi)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
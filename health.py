@@ -0,0 +1,165 @@
+"""Load-balancer probes: ``/healthz`` (liveness) and ``/readyz`` (readiness).
+
+``GET /healthz`` answers 200 as long as the worker can run Python; it touches
+nothing else. Restart the process when it fails.
+
+``GET /readyz`` answers 200 when this worker can serve gameplay and 503 when
+it cannot, with the individual checks as JSON:
+
+* ``database`` — the game config row and the job queue are read over a fresh
+  pool connection, in a helper thread given ``READY_DB_TIMEOUT`` seconds. A
+  hung MariaDB therefore fails the probe quickly instead of hanging it, and
+  only one such ping per worker is ever outstanding.
+* ``pool`` — connections checked out against the pool's capacity; an
+  exhausted pool fails (every request would wait ``pool_timeout``), above
+  ``POOL_WARN_RATIO`` warns.
+* ``jobs`` — age of the oldest due job in the background queue (jobs.py);
+  warns above ``READY_JOB_LAG`` seconds. The queue is shared by every node,
+  so a stalled job worker never takes a node out of rotation.
+* ``cache`` — whether this worker's question catalog matches the running
+  game (it is rebuilt on the next play request if not) and how many public
+  pages it holds.
+* ``warmup`` — whether this worker ran warmup.py's steps and how long they took.
+
+Only ``fail`` results make the worker unready; ``warn`` is informational. The
+result is reused for ``READY_CACHE_SECONDS``, so probing every second from
+several load balancers costs one small query per worker per interval.
+"""
+import threading
+import time
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify
+
+from app import db
+
+health_bp = Blueprint('health', __name__)
+
+POOL_WARN_RATIO = 0.8
+
+_lock = threading.Lock()
+_cached = (0.0, None)      # (monotonic time, (body, status))
+_ping_running = threading.Event()
+
+
+def _query_state(engine):
+    from models import GameConfig, Job
+    with engine.connect() as conn:
+        config = conn.execute(
+            db.select(GameConfig.game_started, GameConfig.catalog_version).limit(1)
+        ).first()
+        oldest_due = conn.execute(
+            db.select(db.func.min(Job.run_after))
+            .where(Job.status == 'queued', Job.run_after <= datetime.utcnow())
+        ).scalar()
+    return config, oldest_due
+
+
+def _ping(engine, timeout):
+    """``(config_row, oldest_due_job, error)`` within `timeout` seconds."""
+    if _ping_running.is_set():
+        return None, None, 'previous ping still waiting for the database'
+    result = {}
+
+    def run():
+        try:
+            result['state'] = _query_state(engine)
+        except Exception as exc:  # noqa: BLE001 - any driver error means not ready
+            result['error'] = f'{type(exc).__name__}: {exc}'[:200]
+        finally:
+            _ping_running.clear()
+
+    _ping_running.set()
+    thread = threading.Thread(target=run, name='readyz-ping', daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if 'state' in result:
+        return result['state'][0], result['state'][1], None
+    return None, None, result.get('error') or f'no answer within {timeout:g}s'
+
+
+def _pool_check(pool):
+    if not hasattr(pool, 'checkedout'):
+        return {'status': 'ok'}
+    size = pool.size()
+    max_overflow = getattr(pool, '_max_overflow', 0)
+    checked_out = pool.checkedout()
+    check = {'checked_out': checked_out, 'size': size}
+    if max_overflow < 0:  # unlimited overflow
+        check['status'] = 'ok'
+        return check
+    capacity = size + max_overflow
+    check['capacity'] = capacity
+    ratio = checked_out / capacity if capacity else 0
+    check['status'] = 'fail' if checked_out >= capacity else 'warn' if ratio >= POOL_WARN_RATIO else 'ok'
+    return check
+
+
+def readiness():
+    """``(body, http_status)`` for /readyz."""
+    import catalog
+    import page_cache
+    import warmup
+
+    engine = db.engine
+    checks = {'pool': _pool_check(engine.pool)}
+    if checks['pool']['status'] == 'fail':
+        checks['database'] = {'status': 'fail', 'error': 'connection pool exhausted'}
+        config, oldest_due = None, None
+    else:
+        started = time.perf_counter()
+        config, oldest_due, error = _ping(engine, current_app.config['READY_DB_TIMEOUT'])
+        checks['database'] = {'status': 'fail', 'error': error} if error else {
+            'status': 'ok', 'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    if checks['database']['status'] == 'ok':
+        lag = (datetime.utcnow() - oldest_due).total_seconds() if oldest_due else 0
+        checks['jobs'] = {'status': 'warn' if lag > current_app.config['READY_JOB_LAG'] else 'ok',
+                          'lag_seconds': int(lag)}
+
+        game_running = bool(config and config.game_started)
+        loaded = catalog.loaded_version()
+        expected = (config.catalog_version or 0) if config else None
+        checks['cache'] = {
+            'status': 'warn' if game_running and loaded != expected else 'ok',
+            'catalog_version': loaded,
+            'game_catalog_version': expected if game_running else None,
+            'cached_pages': page_cache.cached_page_count(),
+        }
+
+    checks['warmup'] = {'status': 'ok' if warmup.state['warmed'] else 'warn',
+                        'seconds': warmup.state['seconds']}
+
+    ready = all(check['status'] != 'fail' for check in checks.values())
+    return {'status': 'ready' if ready else 'unready', 'checks': checks}, 200 if ready else 503
+
+
+@health_bp.route('/healthz')
+def healthz():
+    return 'ok\n', 200, {'Content-Type': 'text/plain', 'Cache-Control': 'no-store'}
+
+
+@health_bp.route('/readyz')
+def readyz():
+    global _cached
+    now = time.monotonic()
+    checked_at, result = _cached
+    if result is None or now - checked_at >= current_app.config['READY_CACHE_SECONDS']:
+        with _lock:
+            checked_at, result = _cached
+            if result is None or now - checked_at >= current_app.config['READY_CACHE_SECONDS']:
+                result = readiness()
+                _cached = (time.monotonic(), result)
+    body, status = result
+    response = jsonify(body)
+    response.status_code = status
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def init_app(app):
+    app.config.setdefault('READY_DB_TIMEOUT', 1.0)
+    app.config.setdefault('READY_JOB_LAG', 300)
+    app.config.setdefault('READY_CACHE_SECONDS', 2.0)
+    app.register_blueprint(health_bp)
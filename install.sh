@@ -78,6 +78,24 @@ ExecStart=$APP_DIR/venv/bin/gunicorn --workers 4 --bind unix:treasure-hunt.sock
 WantedBy=multi-user.target
 EOF
 
+# Background job worker (image processing, file clean-up)
+cat > /etc/systemd/system/treasure-hunt-worker.service << EOF
+[Unit]
+Description=Treasure Hunt background jobs
+After=network.target
+
+[Service]
+User=$ACTUAL_USER
+Group=www-data
+WorkingDirectory=$APP_DIR
+Environment="PATH=$APP_DIR/venv/bin" "FLASK_APP=wsgi"
+ExecStart=$APP_DIR/venv/bin/flask jobs work --concurrency 2
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
 # Create wsgi.py if it doesn't exist
 if [ ! -f "$APP_DIR/wsgi.py" ]; then
     echo "📝 Creating wsgi.py..."
@@ -102,6 +120,15 @@ server {
     client_max_body_size 16M;
 
     location / {
+        include proxy_params;
+        proxy_set_header X-Request-ID $request_id;  # same ID in nginx and app logs
+        proxy_pass http://unix:/path/to/treasure-hunt/treasure-hunt.sock;
+    }
+
+    # Prometheus scrapes from this host only (see DEPLOYMENT.md)
+    location = /metrics {
+        allow 127.0.0.1;
+        deny all;
         include proxy_params;
         proxy_pass http://unix:/path/to/treasure-hunt/treasure-hunt.sock;
     }
@@ -144,6 +171,7 @@ systemctl daemon-reload
 # Enable and start services
 echo "🚀 Enabling services..."
 systemctl enable treasure-hunt
+systemctl enable treasure-hunt-worker
 systemctl enable nginx
 
 echo ""
@@ -166,6 +194,7 @@ echo "   sudo -u $ACTUAL_USER bash -c 'source venv/bin/activate && python migrat
 echo ""
 echo "4. Start the application:"
 echo "   systemctl start treasure-hunt"
+echo "   systemctl start treasure-hunt-worker"
 echo "   systemctl restart nginx"
 echo ""
 echo "5. Check service status:"
@@ -0,0 +1,102 @@
+"""Per-request SQL statistics from SQLAlchemy cursor events.
+
+Every statement any engine executes is timed between ``before_cursor_execute``
+and ``after_cursor_execute``. During a request the figures are summed into a
+:class:`QueryStats` on ``g`` — statement count, total database time and the
+slowest statement — and at the end of the request they are
+
+* logged at DEBUG level (``GET /game/dashboard 200: 6 statements, 4.1 ms …``)
+  and added to the request's line in the JSON log (request_log.py);
+* returned as ``X-DB-Statements``/``X-DB-Time``/``X-DB-Slowest`` and a
+  ``Server-Timing`` header (shown in the browser's network panel) when the
+  app runs in debug mode or ``SQL_STATS_HEADERS`` is set.
+
+Statements over ``SLOW_QUERY_MS`` also go to the slow log (slow_log.py).
+
+Tests use :func:`track_queries` to hold routes to a statement budget.
+"""
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import slow_log
+
+_trackers = []     # QueryStats collected by track_queries() blocks
+
+
+class QueryStats:
+    __slots__ = ('count', 'total', 'slowest', 'slowest_statement')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.total += duration
+        if duration >= self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_start'].pop()
+    stats = g.get('query_stats') if has_request_context() else None
+    if stats is not None:
+        stats.record(statement, duration)
+    for tracker in _trackers:
+        tracker.record(statement, duration)
+    slow_log.query(statement, duration)
+
+
+def request_stats():
+    """The current request's QueryStats (None outside a request)."""
+    return g.get('query_stats') if has_request_context() else None
+
+
+@contextmanager
+def track_queries():
+    """Count every statement executed inside the block, e.g. for query budgets."""
+    stats = QueryStats()
+    _trackers.append(stats)
+    try:
+        yield stats
+    finally:
+        _trackers.remove(stats)
+
+
+def init_app(app):
+    app.config.setdefault('SQL_STATS_HEADERS', False)
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        total_ms, slowest_ms = stats.total * 1000, stats.slowest * 1000
+        if stats.count:
+            current_app.logger.debug(
+                '%s %s %s: %d statements, %.1f ms DB (slowest %.1f ms)',
+                request.method, request.path, response.status_code, stats.count, total_ms, slowest_ms,
+            )
+        if current_app.debug or current_app.config['SQL_STATS_HEADERS']:
+            response.headers['X-DB-Statements'] = str(stats.count)
+            response.headers['X-DB-Time'] = f'{total_ms:.1f}'
+            response.headers['X-DB-Slowest'] = f'{slowest_ms:.1f}'
+            response.headers.add('Server-Timing', f'db;dur={total_ms:.1f};desc="{stats.count} statements"')
+        return response
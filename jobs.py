@@ -0,0 +1,255 @@
+"""Database-backed background jobs for slow admin side effects.
+
+Admin routes call :func:`enqueue` and commit as usual; the job row is saved in
+the same transaction as the change that caused it, so it exists exactly when
+that change does. A separate process started with ``flask jobs work`` runs a
+small thread pool that claims queued rows, runs the registered handler and
+records the outcome — no broker or extra service beyond MariaDB is needed.
+
+Handlers are plain functions registered with :func:`task`. They receive the
+job row and its decoded payload and may call :func:`report_progress`. A
+handler that raises is retried with exponential backoff until
+``max_attempts`` is reached; a job whose worker died mid-run is picked up
+again once its lock is older than ``JOB_LOCK_TIMEOUT``.
+"""
+import calendar
+import json
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+import click
+from flask import Blueprint, current_app
+
+from app import db
+
+HANDLERS = {}
+RETRY_DELAY = 30          # seconds before the first retry; doubles per attempt
+JOB_LOCK_TIMEOUT = 15 * 60
+
+jobs_cli = Blueprint('jobs', __name__, cli_group='jobs')
+
+
+def task(name):
+    """Register a handler for jobs of kind `name`."""
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(kind, payload=None, max_attempts=3):
+    """Add a job to the current session; it runs once the caller commits."""
+    from models import Job
+    if kind not in HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    job = Job(kind=kind, payload=json.dumps(payload or {}), max_attempts=max_attempts)
+    db.session.add(job)
+    return job
+
+
+def report_progress(job, done, total=None, message=None):
+    """Record progress for the admin jobs page (commits immediately)."""
+    job.progress = min(100, int(done * 100 / total)) if total else int(done)
+    job.locked_at = datetime.utcnow()  # heartbeat: long jobs are not mistaken for stale
+    if message is not None:
+        job.message = message[:255]
+    db.session.commit()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Worker
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _retry_at(job, now):
+    return now + timedelta(seconds=RETRY_DELAY * 2 ** max(0, job.attempts - 1))
+
+
+def requeue_stale(now=None):
+    """Release jobs whose worker stopped heartbeating (crashed or was killed).
+
+    A dead worker counts as a failed attempt: the job is retried with the
+    same backoff as one that raised, or marked failed once it has used up
+    ``max_attempts`` — so a job that kills its worker every time stops.
+    """
+    from models import Job
+    now = now or datetime.utcnow()
+    stale = Job.query.filter(
+        Job.status == 'running',
+        Job.locked_at < now - timedelta(seconds=JOB_LOCK_TIMEOUT),
+    ).all()
+    count = 0
+    for job in stale:
+        if job.attempts >= job.max_attempts:
+            values = {Job.status: 'failed', Job.finished_at: now,
+                      Job.message: f'Worker lost; failed after {job.attempts} attempt(s).'}
+        else:
+            values = {Job.status: 'queued', Job.run_after: _retry_at(job, now),
+                      Job.message: f'Worker lost during attempt {job.attempts}; retrying.'}
+        # Skip it if it heartbeated (or was released) since we looked.
+        count += Job.query.filter_by(id=job.id, status='running', locked_at=job.locked_at).update(
+            {**values, Job.locked_by: None}, synchronize_session=False)
+    db.session.commit()
+    return count
+
+
+def claim_next(worker_name):
+    """Atomically take the oldest runnable job, or return None."""
+    from models import Job
+    while True:
+        now = datetime.utcnow()
+        candidate = (
+            db.session.query(Job.id)
+            .filter(Job.status == 'queued', Job.run_after <= now)
+            .order_by(Job.id)
+            .first()
+        )
+        if candidate is None:
+            db.session.rollback()
+            return None
+        # Only one worker can flip queued → running; the others retry.
+        claimed = Job.query.filter_by(id=candidate.id, status='queued').update({
+            Job.status: 'running',
+            Job.locked_by: worker_name,
+            Job.locked_at: now,
+            Job.started_at: now,
+            Job.attempts: Job.attempts + 1,
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, candidate.id)
+
+
+def run_job(job):
+    """Run one claimed job and record success, a scheduled retry or failure."""
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for {job.kind!r}')
+        handler(job, json.loads(job.payload or '{}'))
+    except Exception:
+        db.session.rollback()
+        job.error = traceback.format_exc()[-4000:]
+        job.locked_by = None
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = _retry_at(job, datetime.utcnow())
+            job.message = f'Attempt {job.attempts} failed; retrying.'
+        else:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            job.message = f'Failed after {job.attempts} attempt(s).'
+        db.session.commit()
+        current_app.logger.exception('Job %s (%s) failed', job.id, job.kind)
+        return False
+
+    job.status = 'done'
+    job.progress = 100
+    job.locked_by = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def _work_loop(app, worker_name, poll, stop, once):
+    with app.app_context():
+        while not stop.is_set():
+            job = claim_next(worker_name)
+            if job is None:
+                if once:
+                    break
+                requeue_stale()
+                stop.wait(poll)
+                continue
+            run_job(job)
+            db.session.remove()
+
+
+@jobs_cli.cli.command('work')
+@click.option('--concurrency', '-c', default=2, show_default=True, help='Jobs to run in parallel.')
+@click.option('--poll', default=2.0, show_default=True, help='Seconds to wait when the queue is empty.')
+@click.option('--once', is_flag=True, help='Exit when the queue is empty instead of polling.')
+def work_command(concurrency, poll, once):
+    """Run queued background jobs until stopped (SIGTERM/Ctrl-C)."""
+    app = current_app._get_current_object()
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    requeue_stale()
+    host = f'{socket.gethostname()}:{os.getpid()}'
+    threads = [
+        threading.Thread(target=_work_loop, args=(app, f'{host}/{i}', poll, stop, once), daemon=True)
+        for i in range(max(1, concurrency))
+    ]
+    click.echo(f'Job worker {host} running {len(threads)} thread(s).')
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        time.sleep(0.2)
+
+
+@jobs_cli.cli.command('process-media')
+def process_media_command():
+    """Queue processing for stored images and videos that have no variants yet."""
+    from media import needs_processing
+    from models import Question, QuestionMedia
+    urls = {url for (url,) in db.session.query(Question.media_url)
+            .filter(Question.media_url.isnot(None), Question.media_variants.is_(None))}
+    urls |= {url for (url,) in db.session.query(QuestionMedia.media_url)
+             .filter(QuestionMedia.media_url.isnot(None), QuestionMedia.variants.is_(None))}
+    queued = 0
+    for url in sorted(urls):
+        if needs_processing(url):
+            enqueue('process_media', {'media_url': url})
+            queued += 1
+    db.session.commit()
+    click.echo(click.style(f'{queued} file(s) queued for processing.', fg='green'))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tasks
+# ─────────────────────────────────────────────────────────────────────────────
+
+@task('release_uploads')
+def release_uploads_task(job, payload):
+    """Delete upload files that no question references any more."""
+    from media import release_uploads
+    uploads = [tuple(pair) for pair in payload.get('uploads', [])]
+    released_at = calendar.timegm(job.created_at.utctimetuple()) if job.created_at else None
+    for index, pair in enumerate(uploads, 1):
+        release_uploads([pair], released_at)
+        if index % 20 == 0:
+            report_progress(job, index, len(uploads), f'{index}/{len(uploads)} file(s) checked')
+
+
+@task('process_media')
+def process_media_task(job, payload):
+    """Resize an uploaded image or transcode a video, then record the result on its rows."""
+    from catalog import bump_catalog_version
+    from media import process_stored
+    from models import Question, QuestionMedia
+
+    media_url = payload['media_url']
+    width, height, variants = process_stored(
+        media_url, progress=lambda done, total: report_progress(job, done, total, 'Transcoding'),
+    )
+    if width is None:
+        return
+
+    Question.query.filter_by(media_url=media_url).update({
+        Question.media_width: width,
+        Question.media_height: height,
+        Question.media_variants: variants,
+    }, synchronize_session=False)
+    QuestionMedia.query.filter_by(media_url=media_url).update({
+        QuestionMedia.width: width,
+        QuestionMedia.height: height,
+        QuestionMedia.variants: variants,
+    }, synchronize_session=False)
+    bump_catalog_version()
+    db.session.commit()
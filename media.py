@@ -0,0 +1,535 @@
+"""Upload handling for question media: saving, image derivatives and removal.
+
+Uploads are content-addressed: a file is stored once under
+``uploads/cas/<xx>/<hash><ext>`` no matter how many questions use it, and it
+is only removed when no Question.media_url or QuestionMedia.media_url
+references it any more. Files live wherever storage.py's backend keeps them
+(local disk or an S3-compatible bucket); this module never touches their
+paths directly. Because the URL changes whenever the content does,
+these files are served with immutable, far-future cache headers.
+
+Phone photos uploaded by admins are often several megabytes with EXIF
+(including GPS) attached. The metadata is stripped before an image is hashed
+and stored, so the stored bytes (served as immutable) never carry it. A
+background job (``process_media`` in jobs.py) then records its dimensions
+and writes a handful of smaller renditions — in the original format plus WebP
+(and AVIF where Pillow supports it) — next to the original. play.html turns
+the recorded variants into ``<picture>``/``srcset`` markup so phones
+download a right-sized file and the layout does not shift.
+
+Large files (mostly videos) can also arrive in chunks through a resumable
+upload session: each part is stored as ``uploads/.partial/<id>/<offset>`` as
+it streams in, a client that lost its connection asks how many bytes arrived
+and carries on from there, and the finished parts are joined and hashed into
+the store without ever holding the file in memory.
+
+Videos go through the same job: video.py turns them into HLS renditions and
+a poster frame, recorded in the same ``variants`` column.
+
+Pillow and ffmpeg are optional: without them images and videos are stored
+untouched and served as before.
+"""
+import hashlib
+import json
+import os
+import re
+import secrets
+import tempfile
+import time
+
+from werkzeug.utils import secure_filename
+
+import video
+from storage import get_storage
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover - Pillow not installed
+    Image = None
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+DERIVATIVE_WIDTHS = (480, 960, 1600)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+CAS_FOLDER = 'uploads/cas'
+# Matches content-addressed originals and their derivatives (``-480w.webp``,
+# ``-poster.jpg``, ``-hls/720p_003.ts``).
+CAS_URL = re.compile(r'^uploads/cas/[0-9a-f]{2}/[0-9a-f]{32}(-\d+w|-poster|-hls/[\w-]+)?\.[A-Za-z0-9]+$')
+CHUNK_SIZE = 64 * 1024
+
+PARTIAL_FOLDER = 'uploads/.partial'
+UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+PARTIAL_MAX_AGE = 24 * 3600  # abandoned sessions are swept after a day
+
+
+def _modern_formats():
+    if Image is None:
+        return []
+    formats = [('webp', 'WEBP', {'quality': WEBP_QUALITY, 'method': 4})]
+    if features.check('avif'):
+        formats.append(('avif', 'AVIF', {'quality': AVIF_QUALITY}))
+    return formats
+
+
+def _save_options(fmt):
+    return {'quality': JPEG_QUALITY, 'optimize': True} if fmt == 'JPEG' else {'optimize': True}
+
+
+def strip_metadata(path, ext):
+    """Re-save an image file in place without EXIF/XMP, orientation applied.
+
+    Returns True if the file was rewritten; animations, non-images and files
+    Pillow cannot read are left as they are.
+    """
+    if Image is None or ext.lower() not in IMAGE_EXTENSIONS:
+        return False
+    stripped = path + '.stripped'
+    try:
+        with Image.open(path) as img:
+            # Phone cameras write MPO: a JPEG with extra preview frames.
+            fmt = 'JPEG' if img.format == 'MPO' else img.format
+            if fmt != 'JPEG' and getattr(img, 'is_animated', False):
+                return False  # re-encoding would drop frames
+            img = ImageOps.exif_transpose(img)
+            img.load()
+        if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img.save(stripped, fmt, **_save_options(fmt))
+    except (OSError, ValueError):
+        if os.path.exists(stripped):
+            os.remove(stripped)
+        return False
+    os.replace(stripped, path)
+    return True
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def process_image(media_url):
+    """Write the derivatives of an uploaded image.
+
+    Returns ``(width, height, variants_json)``; all three are None for files
+    that are not images or when Pillow is unavailable.
+    """
+    stem, ext = os.path.splitext(media_url)
+    if Image is None or ext.lower() not in IMAGE_EXTENSIONS:
+        return None, None, None
+
+    storage = get_storage()
+    try:
+        with storage.local_copy(media_url) as path, Image.open(path) as img:
+            animated = getattr(img, 'is_animated', False)
+            fmt = img.format
+            if animated:
+                # Leave animations alone; re-encoding would drop frames.
+                return img.width, img.height, None
+            img = ImageOps.exif_transpose(img)
+            img.load()
+    except (OSError, ValueError):
+        return None, None, None
+
+    with tempfile.TemporaryDirectory(dir=storage.scratch_dir()) as work:
+        def save(image, url, *args, **kwargs):
+            local_path = os.path.join(work, os.path.basename(url))
+            image.save(local_path, *args, **kwargs)
+            storage.put(local_path, url)
+
+        save_kwargs = _save_options(fmt)
+        if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        if not is_immutable(media_url):
+            # Uploads from before content addressing were stored with their
+            # metadata; stored files are stripped by store_file().
+            save(img, media_url, fmt, **save_kwargs)
+
+        width, height = img.size
+        variants = {'original': [], **{name: [] for name, _, _ in _modern_formats()}}
+        widths = [w for w in DERIVATIVE_WIDTHS if w < width] + [width]
+
+        for target_width in widths:
+            if target_width == width:
+                resized = img
+            else:
+                target_height = max(1, round(height * target_width / width))
+                resized = img.resize((target_width, target_height), Image.LANCZOS)
+                variant_url = f'{stem}-{target_width}w{ext}'
+                save(resized, variant_url, fmt, **save_kwargs)
+                variants['original'].append([target_width, variant_url])
+
+            for name, pil_format, options in _modern_formats():
+                source = resized if resized.mode in ('RGB', 'RGBA') else resized.convert('RGBA')
+                variant_url = f'{stem}-{target_width}w.{name}'
+                try:
+                    save(source, variant_url, pil_format, **options)
+                except OSError:
+                    continue
+                variants[name].append([target_width, variant_url])
+
+    variants['original'].append([width, media_url])
+    return width, height, json.dumps(variants)
+
+
+def _known_metadata(media_url):
+    """Dimensions/variants already recorded for a stored file, if any row uses it."""
+    from models import Question, QuestionMedia
+    media = QuestionMedia.query.filter_by(media_url=media_url).filter(QuestionMedia.variants.isnot(None)).first()
+    if media:
+        return media.width, media.height, media.variants
+    question = Question.query.filter_by(media_url=media_url).filter(Question.media_variants.isnot(None)).first()
+    if question:
+        return question.media_width, question.media_height, question.media_variants
+    return None
+
+
+def save_upload(file):
+    """Store an uploaded file by content hash and process it if it is an image.
+
+    The upload is streamed to a temporary file while hashing; if identical
+    content is already stored the copy is discarded and the existing file
+    (and its derivatives) reused. Returns ``(media_url, width, height, variants_json)``;
+    the last three are None for new files until the image has been processed.
+    """
+    ext = os.path.splitext(secure_filename(file.filename))[1].lower()
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=get_storage().scratch_dir(), prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        return store_file(tmp_path, digest.hexdigest()[:32], ext)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def store_file(tmp_path, content_hash, ext):
+    """Strip an image's metadata, then move the temp file into the content-addressed store.
+
+    `content_hash` is that of the file as uploaded; it is recomputed when
+    stripping changed the bytes.
+    """
+    if strip_metadata(tmp_path, ext):
+        content_hash = _file_hash(tmp_path)
+    media_url = f'{CAS_FOLDER}/{content_hash[:2]}/{content_hash}{ext}'
+    storage = get_storage()
+
+    # Touching a file that is already stored tells release_uploads() and the
+    # orphan collector that it is in use again.
+    if storage.touch(media_url):
+        known = _known_metadata(media_url)
+        if known:
+            return (media_url, *known)
+    else:
+        storage.put(tmp_path, media_url)
+
+    # Derivatives are written by the `process_media` background job (jobs.py).
+    return media_url, None, None, None
+
+
+def needs_processing(media_url):
+    """True if a stored file is an image we can resize or a video we can transcode."""
+    if video.is_video(media_url):
+        return video.available()
+    return Image is not None and os.path.splitext(media_url)[1].lower() in IMAGE_EXTENSIONS
+
+
+def transcode_video(media_url, progress=None):
+    """Write HLS renditions and a poster for a stored video; same return shape as process_image."""
+    storage = get_storage()
+    stem = os.path.splitext(media_url)[0]
+    with storage.local_copy(media_url) as path, tempfile.TemporaryDirectory(dir=storage.scratch_dir()) as work:
+        width, height, variants = video.transcode(path, work, progress)
+        storage.delete_prefix(f'{stem}-hls/')
+        for name in os.listdir(os.path.join(work, 'hls')):
+            storage.put(os.path.join(work, 'hls', name), f'{stem}-hls/{name}')
+        storage.put(os.path.join(work, 'poster.jpg'), f'{stem}-poster.jpg')
+    # hls/master.m3u8 → <stem>-hls/master.m3u8, poster.jpg → <stem>-poster.jpg
+    variants = {name: [[size, f'{stem}-{rel}'] for size, rel in entries] for name, entries in variants.items()}
+    return width, height, json.dumps(variants)
+
+
+def process_stored(media_url, progress=None):
+    """``(width, height, variants_json)`` for a stored file, processing it if no row has them yet.
+
+    All three are None when the file has gone or cannot be processed.
+    `progress(done, total)` is passed through to long-running video transcodes.
+    """
+    if not get_storage().exists(media_url):
+        return None, None, None
+    known = _known_metadata(media_url)
+    if known:
+        return known
+    if video.is_video(media_url):
+        return transcode_video(media_url, progress) if video.available() else (None, None, None)
+    return process_image(media_url)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Resumable uploads
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _session_key(upload_id):
+    if not UPLOAD_ID.match(upload_id or ''):
+        return None
+    return f'{PARTIAL_FOLDER}/{upload_id}/session.json'
+
+
+def _read_session(upload_id):
+    key = _session_key(upload_id)
+    data = get_storage().get_bytes(key) if key else None
+    if data is None:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def _write_session(upload_id, session):
+    get_storage().put_bytes(json.dumps(session).encode('utf-8'), _session_key(upload_id))
+
+
+def _parts(upload_id):
+    """``[(offset, key, size)]`` of the chunks stored so far, in order."""
+    parts = []
+    for key, size, _ in get_storage().list(f'{PARTIAL_FOLDER}/{upload_id}/'):
+        name = key.rsplit('/', 1)[1]
+        if name.isdigit():
+            parts.append((int(name), key, size))
+    return sorted(parts)
+
+
+def _sweep_partials(now):
+    storage = get_storage()
+    last_touched = {}
+    for key, _, mtime in storage.list(f'{PARTIAL_FOLDER}/'):
+        upload_id = key[len(PARTIAL_FOLDER) + 1:].split('/', 1)[0]
+        last_touched[upload_id] = max(mtime, last_touched.get(upload_id, 0))
+    for upload_id, mtime in last_touched.items():
+        if now - mtime > PARTIAL_MAX_AGE:
+            storage.delete_prefix(f'{PARTIAL_FOLDER}/{upload_id}/')
+
+
+def start_upload(filename, size):
+    """Open a resumable upload session for a file of `size` bytes; returns its id."""
+    _sweep_partials(time.time())
+    upload_id = secrets.token_hex(16)
+    ext = os.path.splitext(secure_filename(filename or ''))[1].lower()
+    _write_session(upload_id, {'filename': filename, 'ext': ext, 'size': size, 'result': None})
+    return upload_id
+
+
+def upload_status(upload_id):
+    """``{'size', 'received', 'complete'}`` for a session, or None if unknown.
+
+    ``received`` is the total size of the stored chunks, so a chunk cut off
+    half way simply resumes from wherever its bytes stopped.
+    """
+    session = _read_session(upload_id)
+    if session is None:
+        return None
+    if session['result']:
+        received = session['size']
+    else:
+        received = sum(size for _, _, size in _parts(upload_id))
+    return {'size': session['size'], 'received': received, 'complete': bool(session['result'])}
+
+
+def write_chunk(upload_id, stream, offset):
+    """Store `stream` as the chunk starting at `offset`; returns bytes received so far.
+
+    Anything beyond the declared size is discarded. The caller checks the
+    client's offset against :func:`upload_status` first.
+    """
+    session = _read_session(upload_id)
+    storage = get_storage()
+    fd, tmp_path = tempfile.mkstemp(dir=storage.scratch_dir(), prefix='.chunk-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            remaining = session['size'] - offset
+            while remaining > 0:
+                chunk = stream.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                out.write(chunk)
+                remaining -= len(chunk)
+            written = out.tell()
+        if written:
+            storage.put(tmp_path, f'{PARTIAL_FOLDER}/{upload_id}/{offset:015d}')
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return offset + written
+
+
+def finish_upload(upload_id):
+    """Join and hash the stored chunks, then move the file into the content-addressed store.
+
+    Returns the stored ``(media_url, width, height, variants_json)``; the
+    result is kept in the session until a form claims it.
+    """
+    session = _read_session(upload_id)
+    if session['result']:
+        return tuple(session['result'])
+
+    storage = get_storage()
+    parts = _parts(upload_id)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=storage.scratch_dir(), prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for _, key, _ in parts:
+                with storage.local_copy(key) as part_path, open(part_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                        out.write(chunk)
+        result = store_file(tmp_path, digest.hexdigest()[:32], session['ext'])
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    for _, key, _ in parts:
+        storage.delete(key)
+    session['result'] = list(result)
+    _write_session(upload_id, session)
+    return result
+
+
+def claim_upload(upload_id):
+    """Consume a finished session, returning what :func:`save_upload` would.
+
+    Returns None for unknown or unfinished sessions.
+    """
+    session = _read_session(upload_id)
+    if session is None or not session['result']:
+        return None
+    get_storage().delete_prefix(f'{PARTIAL_FOLDER}/{upload_id}/')
+    return tuple(session['result'])
+
+
+def is_immutable(media_url):
+    """True for content-addressed files, which may be cached forever."""
+    return bool(CAS_URL.match(media_url))
+
+
+def reference_count(media_url):
+    from models import Question, QuestionMedia
+    return (
+        Question.query.filter_by(media_url=media_url).count()
+        + QuestionMedia.query.filter_by(media_url=media_url).count()
+    )
+
+
+def variant_urls(media_url, variants_json):
+    """Every file belonging to an upload: the original plus its derivatives."""
+    urls = {media_url} if media_url else set()
+    if variants_json:
+        for entries in json.loads(variants_json).values():
+            urls.update(url for _, url in entries)
+    return urls
+
+
+def release_uploads(uploads, released_at=None):
+    """Delete files no row references any more.
+
+    `uploads` is an iterable of ``(media_url, variants_json)`` pairs taken from
+    rows that were just deleted or changed; call it after committing so the
+    reference counts see the new state. Files still used elsewhere are kept.
+
+    An identical upload stored after `released_at` (epoch seconds, when the
+    release was queued) reuses the same file and touches it, but its row may
+    not be committed yet, so such files are kept too. If they really are
+    orphaned, ``flask media gc`` collects them later.
+    """
+    storage = get_storage()
+    for media_url, variants_json in set(uploads):
+        if not media_url or reference_count(media_url):
+            continue
+        modified = storage.modified(media_url)
+        if released_at is not None and modified is not None and modified >= released_at:
+            continue
+        for url in variant_urls(media_url, variants_json):
+            if url.endswith('.m3u8'):
+                storage.delete_prefix(url.rsplit('/', 1)[0] + '/')  # playlist + segments
+            else:
+                storage.delete(url)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Orphan collection
+# ─────────────────────────────────────────────────────────────────────────────
+
+QUARANTINE_FOLDER = 'uploads/.quarantine'
+# Managed elsewhere: resumable sessions sweep themselves, quarantine is kept
+# until someone empties it.
+GC_SKIP = (PARTIAL_FOLDER + '/', QUARANTINE_FOLDER + '/')
+
+
+def referenced_media():
+    """Every stored path a row still points at, with one query per table.
+
+    Returns ``(paths, hls_dirs)``; a file under one of ``hls_dirs`` is in use
+    because its master playlist is.
+    """
+    from app import db
+    from models import Question, QuestionMedia
+    paths = set()
+    rows = db.session.query(Question.media_url, Question.media_variants).filter(Question.media_url.isnot(None))
+    for media_url, variants_json in rows:
+        paths |= variant_urls(media_url, variants_json)
+    for media_url, variants_json in db.session.query(QuestionMedia.media_url, QuestionMedia.variants):
+        paths |= variant_urls(media_url, variants_json)
+    hls_dirs = {url.rsplit('/', 1)[0] + '/' for url in paths if url.endswith('.m3u8')}
+    return paths, hls_dirs
+
+
+def find_orphans(grace_seconds, now=None):
+    """Yield ``(key, size, mtime)`` for stored files no row references.
+
+    Files modified within `grace_seconds` are left alone: an upload is stored
+    before its question row is committed, and derivatives are written before
+    the job records them.
+    """
+    now = time.time() if now is None else now
+    paths, hls_dirs = referenced_media()
+    for key, size, mtime in get_storage().list('uploads/'):
+        if key.startswith(GC_SKIP) or key.endswith('/.gitkeep') or now - mtime < grace_seconds:
+            continue
+        head, sep, _ = key.partition('-hls/')
+        if key in paths or (sep and head + sep in hls_dirs):
+            continue
+        yield key, size, mtime
+
+
+def quarantine(key, batch):
+    """Move an orphan to ``uploads/.quarantine/<batch>/…`` where it can be restored from."""
+    get_storage().move(key, f'{QUARANTINE_FOLDER}/{batch}/{key[len("uploads/"):]}')
+
+
+def srcsets(variants_json):
+    """Parse stored variants into ``{format: 'url 480w, url 960w'}`` for templates."""
+    from routes.media import media_src
+    if not variants_json:
+        return {}
+    return {
+        name: ', '.join(f"{media_src(url)} {width}w" for width, url in entries)
+        for name, entries in json.loads(variants_json).items()
+        if entries
+    }
+
+
+def video_sources(variants_json):
+    """``{'hls': media_url, 'poster': media_url}`` for a transcoded video (empty otherwise)."""
+    if not variants_json:
+        return {}
+    variants = json.loads(variants_json)
+    return {name: variants[name][-1][1] for name in ('hls', 'poster') if variants.get(name)}
@@ -0,0 +1,251 @@
+"""Memory diagnostics for gunicorn workers: tracemalloc snapshots and RSS per request.
+
+Every request records how much the worker's resident set grew while it ran
+(current RSS from ``/proc/self/statm`` before and after; with threaded
+workers a concurrent request can share the blame). Each worker writes those
+figures, grouped by endpoint, to ``<PROFILE_DIR>/memory/worker-<pid>.json``
+every ``STATUS_INTERVAL`` seconds, and **Admin → Reports & Analytics →
+Memory** shows all workers side by side.
+
+Allocation tracing is off by default because tracemalloc slows Python down.
+From the admin page it can be switched on for a limited time; workers pick
+that up through profiling.py's control file, as they do profiling requests.
+While it is on, every request also records its Python heap peak, and the
+admin can ask for a snapshot: each worker takes one at the end of its next
+request and stores a summary — allocated bytes by the innermost
+``file:line`` in this codebase, and by library file for allocations that
+never pass through our code (the SQLAlchemy identity map, Jinja's caches,
+werkzeug's form parser). Two snapshots of the same worker can be diffed to
+see which sites grew between them.
+"""
+import json
+import os
+import resource
+import time
+import tracemalloc
+from collections import Counter
+
+from flask import g, request
+
+import profiling
+
+NFRAMES = 16
+MAX_MINUTES = 60
+STATUS_INTERVAL = 10
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+_started_tracing = False      # tracemalloc was started by us, not by -X tracemalloc
+_last_snapshot = None
+_written_at = 0.0
+_endpoints = {}               # endpoint → [requests, RSS growth KB, times RSS grew, max heap peak]
+
+
+def memory_dir():
+    return os.path.join(profiling.profile_dir(), 'memory')
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where /proc is missing."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KB on Linux
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Control (from the admin page)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def enable_tracing(directory, minutes):
+    minutes = max(1, min(int(minutes), MAX_MINUTES))
+    with profiling.locked_control(directory) as control:
+        control['tracemalloc'] = {'until': time.time() + minutes * 60, 'snapshot': None}
+    return minutes
+
+
+def disable_tracing(directory):
+    with profiling.locked_control(directory) as control:
+        control.pop('tracemalloc', None)
+
+
+def request_snapshot(directory):
+    """Ask every worker for a snapshot; returns its id, or None if tracing is off."""
+    with profiling.locked_control(directory) as control:
+        session = control.get('tracemalloc')
+        if not session or session['until'] <= time.time():
+            return None
+        now = time.time()  # milliseconds too, so two requests in one second differ
+        session['snapshot'] = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+        return session['snapshot']
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Snapshots
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _site(traceback):
+    """Innermost frame in our code as ``file:line``, or the library file that allocated."""
+    for frame in reversed(traceback):  # frames run oldest → most recent
+        path = frame.filename
+        if path.startswith(APP_ROOT + os.sep) and 'site-packages' not in path:
+            return 'ours', f'{os.path.relpath(path, APP_ROOT)}:{frame.lineno}'
+    path = traceback[-1].filename
+    if 'site-packages' + os.sep in path:
+        path = path.split('site-packages' + os.sep, 1)[1]
+    return 'libraries', path
+
+
+def summarize_snapshot(snapshot):
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__, all_frames=True),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ])
+    sizes = {'ours': Counter(), 'libraries': Counter()}
+    counts = {'ours': Counter(), 'libraries': Counter()}
+    for stat in snapshot.statistics('traceback'):
+        group, site = _site(stat.traceback)
+        sizes[group][site] += stat.size
+        counts[group][site] += stat.count
+    return {
+        group: {site: [size, counts[group][site]] for site, size in sizes[group].most_common(200)}
+        for group in sizes
+    } | {'total': sum(sum(group.values()) for group in sizes.values())}
+
+
+def _take_snapshot(snapshot_id):
+    summary = summarize_snapshot(tracemalloc.take_snapshot())
+    summary.update(id=snapshot_id, pid=os.getpid(), taken=time.time(), rss=current_rss())
+    folder = memory_dir()
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f'snapshot-{snapshot_id}-{os.getpid()}.json'), 'w') as f:
+        json.dump(summary, f)
+
+
+def snapshots(directory):
+    """``{snapshot_id: {pid: summary}}``, newest id first."""
+    folder = os.path.join(directory, 'memory')
+    found = {}
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        names = []
+    for name in names:
+        if name.startswith('snapshot-') and name.endswith('.json'):
+            try:
+                with open(os.path.join(folder, name)) as f:
+                    summary = json.load(f)
+            except (OSError, ValueError):
+                continue
+            found.setdefault(summary['id'], {})[summary['pid']] = summary
+    return dict(sorted(found.items(), reverse=True))
+
+
+def diff(before, after, group='ours', limit=25):
+    """``[(site, size_delta, count_delta, size_after)]`` between two summaries of one worker."""
+    old, new = before.get(group, {}), after.get(group, {})
+    rows = []
+    for site in set(old) | set(new):
+        old_size, old_count = old.get(site, (0, 0))
+        new_size, new_count = new.get(site, (0, 0))
+        if new_size != old_size:
+            rows.append((site, new_size - old_size, new_count - old_count, new_size))
+    rows.sort(key=lambda row: abs(row[1]), reverse=True)
+    return rows[:limit]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Per-worker status
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _write_status():
+    folder = memory_dir()
+    os.makedirs(folder, exist_ok=True)
+    status = {
+        'pid': os.getpid(),
+        'updated': time.time(),
+        'rss': current_rss(),
+        'peak_rss': _peak_rss(),
+        'tracing': tracemalloc.is_tracing(),
+        'traced': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+        'endpoints': _endpoints,
+    }
+    tmp = os.path.join(folder, f'.worker-{os.getpid()}.json')
+    with open(tmp, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp, os.path.join(folder, f'worker-{os.getpid()}.json'))
+
+
+def worker_statuses(directory, max_age=3600):
+    """Status files of workers that served a request within `max_age` seconds."""
+    folder = os.path.join(directory, 'memory')
+    statuses = []
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        names = []
+    for name in names:
+        if name.startswith('worker-') and name.endswith('.json'):
+            try:
+                with open(os.path.join(folder, name)) as f:
+                    status = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if time.time() - status['updated'] <= max_age:
+                statuses.append(status)
+    return sorted(statuses, key=lambda status: status['pid'])
+
+
+def _sync_tracing(session):
+    """Start or stop tracemalloc to match the admin's setting."""
+    global _started_tracing
+    wanted = bool(session) and session['until'] > time.time()
+    if wanted and not tracemalloc.is_tracing():
+        tracemalloc.start(NFRAMES)
+        _started_tracing = True
+    elif not wanted and _started_tracing:
+        tracemalloc.stop()
+        _started_tracing = False
+    return wanted
+
+
+def init_app(app):
+    @app.before_request
+    def start_memory_tracking():
+        g.memory_rss = current_rss()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    @app.teardown_request
+    def finish_memory_tracking(exc):
+        global _last_snapshot, _written_at
+        start = g.pop('memory_rss', None)
+        if start is None:  # no /proc here
+            return
+        growth = (current_rss() or start) - start
+        stats = _endpoints.setdefault(request.endpoint or 'unmatched', [0, 0, 0, 0])
+        stats[0] += 1
+        if growth > 0:
+            stats[1] += growth // 1024
+            stats[2] += 1
+        if tracemalloc.is_tracing():
+            stats[3] = max(stats[3], tracemalloc.get_traced_memory()[1])
+
+        session = profiling.current_control(profiling.profile_dir()).get('tracemalloc')
+        tracing = _sync_tracing(session)
+        if tracing and session.get('snapshot') and session['snapshot'] != _last_snapshot:
+            _last_snapshot = session['snapshot']
+            _take_snapshot(_last_snapshot)
+
+        if time.monotonic() - _written_at >= STATUS_INTERVAL:
+            _written_at = time.monotonic()
+            _write_status()
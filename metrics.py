@@ -0,0 +1,179 @@
+"""Prometheus metrics: request latency, in-flight requests, DB pool and game events.
+
+``GET /metrics`` returns the Prometheus text format. Gunicorn runs several
+worker processes, each with its own counters, so metrics are kept in
+prometheus_client's multiprocess mode: every worker writes to memory-mapped
+files under ``PROMETHEUS_MULTIPROC_DIR`` and a scrape (or the admin
+Performance page) reads and sums them all, whichever worker answers it.
+gunicorn.conf.py sets the directory up and cleans up after exited workers.
+Without that variable (``flask run``) the single process's metrics are served.
+
+Set ``METRICS_TOKEN`` to require ``Authorization: Bearer <token>`` on scrapes.
+prometheus_client is optional: without it nothing is recorded and
+``/metrics`` returns 404.
+"""
+import hmac
+import os
+import time
+
+from flask import Blueprint, abort, current_app, g, request
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    )
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - prometheus_client not installed
+    Counter = None
+
+metrics_bp = Blueprint('metrics', __name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+if Counter is not None:
+    REQUEST_LATENCY = Histogram(
+        'treasure_hunt_request_duration_seconds', 'Time spent handling a request.',
+        ['endpoint', 'method'], buckets=LATENCY_BUCKETS,
+    )
+    REQUESTS = Counter('treasure_hunt_requests_total', 'Requests handled.', ['endpoint', 'method', 'status'])
+    IN_PROGRESS = Gauge('treasure_hunt_requests_in_progress', 'Requests being handled right now.',
+                        multiprocess_mode='livesum')
+    POOL_CHECKED_OUT = Gauge('treasure_hunt_db_pool_checked_out', 'DB connections in use.',
+                             multiprocess_mode='livesum')
+    POOL_SIZE = Gauge('treasure_hunt_db_pool_size', 'Configured DB pool size.',
+                      multiprocess_mode='livesum')
+    POOL_OVERFLOW = Gauge('treasure_hunt_db_pool_overflow', 'DB connections opened beyond pool_size.',
+                          multiprocess_mode='livesum')
+    ANSWERS = Counter('treasure_hunt_answers_total', 'Answers submitted.', ['result'])
+    CLUES_USED = Counter('treasure_hunt_clues_used_total', 'Clues revealed to teams.')
+    LEVEL_ADVANCES = Counter('treasure_hunt_level_advances_total', 'Teams advancing to the next level.')
+
+    # GameLog action → counter to bump once the log row is committed.
+    GAME_ACTIONS = {
+        'SUBMIT_CORRECT_ANSWER': ANSWERS.labels(result='correct'),
+        'SUBMIT_INCORRECT_ANSWER': ANSWERS.labels(result='incorrect'),
+        'USE_CLUE': CLUES_USED,
+        'LEVEL_ADVANCE': LEVEL_ADVANCES,
+    }
+else:
+    GAME_ACTIONS = {}
+
+
+def record_game_action(action):
+    counter = GAME_ACTIONS.get(action)
+    if counter is not None:
+        counter.inc()
+
+
+def _registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def _record_pool():
+    from app import db
+    pool = db.engine.pool
+    for gauge, method in ((POOL_CHECKED_OUT, 'checkedout'), (POOL_SIZE, 'size'), (POOL_OVERFLOW, 'overflow')):
+        if hasattr(pool, method):
+            gauge.set(max(0, getattr(pool, method)()))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Latency summaries for the admin Performance page
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _quantile(q, buckets, count):
+    """Estimate a quantile from cumulative ``[(upper_bound, count)]`` buckets.
+
+    Interpolates linearly inside the bucket, like PromQL's histogram_quantile.
+    """
+    rank = q * count
+    lower_bound, lower_count = 0.0, 0.0
+    for upper_bound, cumulative in buckets:
+        if cumulative >= rank:
+            if upper_bound == float('inf'):
+                return lower_bound
+            width = cumulative - lower_count
+            fraction = (rank - lower_count) / width if width else 0
+            return lower_bound + (upper_bound - lower_bound) * fraction
+        lower_bound, lower_count = upper_bound, cumulative
+    return lower_bound
+
+
+def latency_summary(prefix=''):
+    """``[{'endpoint', 'count', 'p50', 'p95', 'p99', 'mean'}]`` (seconds) across all workers."""
+    if Counter is None:
+        return []
+    buckets, sums = {}, {}
+    for metric in _registry().collect():
+        if metric.name != 'treasure_hunt_request_duration_seconds':
+            continue
+        for sample in metric.samples:
+            endpoint = sample.labels.get('endpoint', '')
+            if not endpoint.startswith(prefix):
+                continue
+            if sample.name.endswith('_bucket'):
+                bound = float(sample.labels['le'])
+                per_bound = buckets.setdefault(endpoint, {})
+                per_bound[bound] = per_bound.get(bound, 0) + sample.value  # summed over methods
+            elif sample.name.endswith('_sum'):
+                sums[endpoint] = sums.get(endpoint, 0) + sample.value
+
+    rows = []
+    for endpoint, per_bound in buckets.items():
+        cumulative = sorted(per_bound.items())
+        count = cumulative[-1][1]
+        if not count:
+            continue
+        rows.append({
+            'endpoint': endpoint,
+            'count': int(count),
+            'mean': sums.get(endpoint, 0) / count,
+            **{f'p{int(q * 100)}': _quantile(q, cumulative, count) for q in (0.5, 0.95, 0.99)},
+        })
+    return sorted(rows, key=lambda row: row['endpoint'])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Request hooks and endpoint
+# ─────────────────────────────────────────────────────────────────────────────
+
+@metrics_bp.route('/metrics')
+def export():
+    if Counter is None:
+        abort(404)
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    return generate_latest(_registry()), 200, {'Content-Type': CONTENT_TYPE_LATEST}
+
+
+def init_app(app):
+    app.register_blueprint(metrics_bp)
+    if Counter is None:
+        return
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.in_flight = True
+        IN_PROGRESS.inc()
+
+    # Also runs for unhandled exceptions, with the 500 response.
+    @app.after_request
+    def observe_request(response):
+        started = g.pop('request_started', None)
+        if started is not None and request.endpoint != 'metrics.export':
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+            REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+            _record_pool()
+        return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        if g.pop('in_flight', False):
+            IN_PROGRESS.dec()
@@ -0,0 +1,15 @@
+"""Add catalog_version column to game_config table."""
+from app import create_app, db
+
+app = create_app()
+with app.app_context():
+    try:
+        db.session.execute(db.text('ALTER TABLE game_config ADD COLUMN catalog_version INT DEFAULT 0'))
+        db.session.commit()
+        print("Added catalog_version column.")
+    except Exception as e:
+        db.session.rollback()
+        if 'duplicate column' in str(e).lower() or 'already exists' in str(e).lower():
+            print("Column already exists, skipping.")
+        else:
+            raise
@@ -0,0 +1,47 @@
+"""
+Database Migration Script
+Creates the jobs table used by the background job runner (jobs.py).
+"""
+
+from app import create_app, db
+from sqlalchemy import text
+
+app = create_app()
+
+
+def migrate():
+    with app.app_context():
+        print("Starting jobs migration...")
+
+        result = db.session.execute(text("SHOW TABLES LIKE 'jobs'"))
+        if not result.fetchone():
+            print("Creating 'jobs' table...")
+            db.session.execute(text("""
+                CREATE TABLE jobs (
+                    id INTEGER NOT NULL AUTO_INCREMENT,
+                    kind VARCHAR(50) NOT NULL,
+                    payload TEXT,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    message VARCHAR(255),
+                    error TEXT,
+                    run_after DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    locked_by VARCHAR(100),
+                    locked_at DATETIME,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    started_at DATETIME,
+                    finished_at DATETIME,
+                    PRIMARY KEY (id),
+                    INDEX ix_jobs_status (status)
+                )
+            """))
+            db.session.commit()
+            print("✓ 'jobs' table created successfully")
+        else:
+            print("! 'jobs' table already exists")
+
+
+if __name__ == "__main__":
+    migrate()
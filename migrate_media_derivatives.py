@@ -0,0 +1,60 @@
+"""
+Database Migration Script
+Adds image dimension/derivative columns to questions and question_media,
+then generates derivatives for images that are already uploaded.
+"""
+
+from app import create_app, db
+from sqlalchemy import text
+
+NEW_COLUMNS = [
+    ('questions', 'media_width', 'INT NULL'),
+    ('questions', 'media_height', 'INT NULL'),
+    ('questions', 'media_variants', 'TEXT NULL'),
+    ('question_media', 'width', 'INT NULL'),
+    ('question_media', 'height', 'INT NULL'),
+    ('question_media', 'variants', 'TEXT NULL'),
+]
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        from media import process_image
+        from models import Question, QuestionMedia
+
+        try:
+            for table, column, ddl in NEW_COLUMNS:
+                exists = db.session.execute(text(
+                    "SELECT COUNT(*) FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = DATABASE() "
+                    "AND TABLE_NAME = :table AND COLUMN_NAME = :column"
+                ), {'table': table, 'column': column}).scalar() > 0
+
+                if exists:
+                    print(f"✓ Column '{column}' already exists in '{table}' table")
+                else:
+                    db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                    db.session.commit()
+                    print(f"✓ Added '{column}' column to {table} table")
+
+            print("\nGenerating derivatives for existing images...")
+            processed = 0
+            for q in Question.query.filter(Question.media_url.isnot(None), Question.media_variants.is_(None)):
+                q.media_width, q.media_height, q.media_variants = process_image(q.media_url)
+                processed += q.media_variants is not None
+            for m in QuestionMedia.query.filter(QuestionMedia.media_type == 'image', QuestionMedia.variants.is_(None)):
+                m.width, m.height, m.variants = process_image(m.media_url)
+                processed += m.variants is not None
+            db.session.commit()
+            print(f"✓ {processed} image(s) processed")
+
+            print("\n✅ Migration completed successfully!")
+
+        except Exception as e:
+            print(f"\n✗ Migration failed: {str(e)}")
+            db.session.rollback()
+
+if __name__ == '__main__':
+    migrate_database()
@@ -0,0 +1,17 @@
+"""Add updated_at column to menu_items table (used by page_cache.py)."""
+from app import create_app, db
+
+app = create_app()
+with app.app_context():
+    try:
+        db.session.execute(db.text(
+            'ALTER TABLE menu_items ADD COLUMN updated_at DATETIME DEFAULT CURRENT_TIMESTAMP'
+        ))
+        db.session.commit()
+        print("Added updated_at column.")
+    except Exception as e:
+        db.session.rollback()
+        if 'duplicate column' in str(e).lower() or 'already exists' in str(e).lower():
+            print("Column already exists, skipping.")
+        else:
+            raise
@@ -0,0 +1,58 @@
+"""
+Database Migration Script
+Adds pre-rendered HTML columns for question text, explanations and CMS
+bodies, then renders them for existing rows.
+"""
+
+from app import create_app, db
+from sqlalchemy import text
+
+NEW_COLUMNS = [
+    ('questions', 'question_html', 'TEXT NULL'),
+    ('questions', 'explanation_html', 'TEXT NULL'),
+    ('questions', 'html_hash', 'VARCHAR(64) NULL'),
+    ('site_content', 'body_html', 'TEXT NULL'),
+    ('site_content', 'html_hash', 'VARCHAR(64) NULL'),
+    ('pages', 'content_html', 'TEXT NULL'),
+    ('pages', 'html_hash', 'VARCHAR(64) NULL'),
+]
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        from models import RICH_TEXT_FIELDS
+        from rich_text import refresh_rendered
+
+        try:
+            for table, column, ddl in NEW_COLUMNS:
+                exists = db.session.execute(text(
+                    "SELECT COUNT(*) FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = DATABASE() "
+                    "AND TABLE_NAME = :table AND COLUMN_NAME = :column"
+                ), {'table': table, 'column': column}).scalar() > 0
+
+                if exists:
+                    print(f"✓ Column '{column}' already exists in '{table}' table")
+                else:
+                    db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                    db.session.commit()
+                    print(f"✓ Added '{column}' column to {table} table")
+
+            print("\nRendering existing content...")
+            for model, fields in RICH_TEXT_FIELDS.items():
+                rows = model.query.all()
+                for row in rows:
+                    refresh_rendered(row, fields)
+                db.session.commit()
+                print(f"✓ {len(rows)} {model.__tablename__} row(s) rendered")
+
+            print("\n✅ Migration completed successfully!")
+
+        except Exception as e:
+            print(f"\n✗ Migration failed: {str(e)}")
+            db.session.rollback()
+
+if __name__ == '__main__':
+    migrate_database()
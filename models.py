@@ -3,9 +3,13 @@ from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
+from rich_text import refresh_rendered
+from tracing import span
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    with span('auth.load_user'):
+        return User.query.get(int(user_id))
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -78,6 +82,7 @@ class GameConfig(db.Model):
     game_started = db.Column(db.Boolean, default=False)
     registration_enabled = db.Column(db.Boolean, default=True)  # Toggle registration window
     login_key = db.Column(db.String(50), nullable=True)  # Shared key for login (bot prevention)
+    catalog_version = db.Column(db.Integer, default=0)  # Bumped on question edits; see catalog.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Level(db.Model):
@@ -103,8 +108,14 @@ class Question(db.Model):
     question_type = db.Column(db.String(20), nullable=False)  # text, image, video, mixed
     question_text = db.Column(db.Text, nullable=False)  # Now supports HTML content
     media_url = db.Column(db.String(255), nullable=True)  # Kept for backward compatibility
+    media_width = db.Column(db.Integer, nullable=True)     # Pixel size of media_url when it is an image
+    media_height = db.Column(db.Integer, nullable=True)
+    media_variants = db.Column(db.Text, nullable=True)     # JSON of resized/WebP derivatives (see media.py)
     answer = db.Column(db.String(255), nullable=False)
     explanation = db.Column(db.Text, nullable=True)  # Explanation shown after correct answer (HTML supported)
+    question_html = db.Column(db.Text, nullable=True)     # Sanitized question_text, rendered on save
+    explanation_html = db.Column(db.Text, nullable=True)  # Sanitized explanation, rendered on save
+    html_hash = db.Column(db.String(64), nullable=True)   # Hash of the raw fields the *_html columns came from
     points = db.Column(db.Integer, default=10)  # Points for correct answer
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -124,6 +135,9 @@ class QuestionMedia(db.Model):
     media_type = db.Column(db.String(20), nullable=False)  # image, video, audio, document
     media_url = db.Column(db.String(500), nullable=False)
     media_caption = db.Column(db.String(255), nullable=True)
+    width = db.Column(db.Integer, nullable=True)       # Pixel size for images; NULL otherwise
+    height = db.Column(db.Integer, nullable=True)
+    variants = db.Column(db.Text, nullable=True)       # JSON of resized/WebP derivatives (see media.py)
     display_order = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -194,6 +208,8 @@ class SiteContent(db.Model):
     heading = db.Column(db.String(255), nullable=False, default='Welcome to Treasure Hunt')
     subheading = db.Column(db.String(255), nullable=True, default='An exciting adventure awaits!')
     body_text = db.Column(db.Text, nullable=True)
+    body_html = db.Column(db.Text, nullable=True)       # Sanitized body_text, rendered on save
+    html_hash = db.Column(db.String(64), nullable=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
@@ -206,6 +222,8 @@ class Page(db.Model):
     url = db.Column(db.String(255), unique=True, nullable=False)      # URL path e.g. /about
     title = db.Column(db.String(255), nullable=False)
     content = db.Column(db.Text, nullable=True)
+    content_html = db.Column(db.Text, nullable=True)    # Sanitized content, rendered on save
+    html_hash = db.Column(db.String(64), nullable=True)
     is_published = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -221,3 +239,45 @@ class MenuItem(db.Model):
     link = db.Column(db.String(255), nullable=False)             # URL or path
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Job(db.Model):
+    """Background job run by `flask jobs work` (see jobs.py)."""
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=True)                  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued/running/done/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0–100
+    message = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.Text, nullable=True)                    # last traceback
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+
+# Rich-text columns rendered once at save time (see rich_text.py) so templates
+# can emit the cached fragment instead of the raw admin HTML.
+RICH_TEXT_FIELDS = {
+    Question: {'question_text': 'question_html', 'explanation': 'explanation_html'},
+    SiteContent: {'body_text': 'body_html'},
+    Page: {'content': 'content_html'},
+}
+
+
+def _register_rich_text(model, fields):
+    def render(mapper, connection, target):
+        refresh_rendered(target, fields)
+    db.event.listen(model, 'before_insert', render)
+    db.event.listen(model, 'before_update', render)
+
+
+for _model, _fields in RICH_TEXT_FIELDS.items():
+    _register_rich_text(_model, _fields)
@@ -0,0 +1,157 @@
+"""Per-worker cache of rendered public pages for anonymous visitors.
+
+The home page takes the whole spike when the registration link goes out, and
+every hit used to load SiteContent, the menu and GameConfig just to produce
+the same HTML. Views wrapped in :func:`cached_page` are rendered once per
+worker and the bytes are replayed to anonymous visitors — no template
+rendering and, between checks, no database round trip.
+
+An entry is keyed by path and tagged with a stamp of the content it was
+rendered from: the newest ``updated_at`` (and row count) of site_content,
+pages and menu_items. Each worker re-reads the stamp with one query at most
+every ``PAGE_CACHE_TTL`` seconds, so an edit made on another worker or node
+shows up within that time; routes/admin/cms.py calls :func:`invalidate_pages`
+after its writes so the worker that saved the edit drops its copy at once.
+
+Logged-in users (whose navigation differs) and requests with pending flash
+messages or a query string always get a fresh render.
+
+The same stamp drives :func:`page_routes`, an in-memory table of published
+pages by ``url`` and ``page_id``. Public page views resolve paths in it, so
+unknown or unpublished paths are turned away without a query.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, request, session
+from flask_login import current_user
+
+from app import db
+
+_lock = threading.Lock()
+_pages = {}        # path → (stamp, body, etag)
+_routes = None     # PageRoutes for the current stamp
+_stamp = None
+_checked_at = 0.0
+
+# DATETIME columns keep whole seconds: two edits in the same second share a
+# stamp, so content changed this recently is not cached yet.
+SETTLE_SECONDS = 2
+
+
+def content_stamp():
+    """One query summarising every row the public pages render from."""
+    from models import MenuItem, Page, SiteContent
+    columns = []
+    for model in (SiteContent, Page, MenuItem):
+        columns.append(db.session.query(db.func.max(model.updated_at)).scalar_subquery())
+        columns.append(db.session.query(db.func.count(model.id)).scalar_subquery())
+    return tuple(db.session.query(*columns).one())
+
+
+def _current_stamp():
+    global _stamp, _checked_at
+    now = time.monotonic()
+    if _stamp is None or now - _checked_at >= current_app.config['PAGE_CACHE_TTL']:
+        with _lock:
+            if _stamp is None or now - _checked_at >= current_app.config['PAGE_CACHE_TTL']:
+                _stamp = content_stamp()
+                _checked_at = now
+    return _stamp
+
+
+def invalidate_pages():
+    """Drop this worker's cached pages and routes; call after committing a CMS edit."""
+    global _stamp, _routes
+    with _lock:
+        _pages.clear()
+        _stamp = None
+        _routes = None
+
+
+def cached_page_count():
+    return len(_pages)
+
+
+def _cacheable():
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.args
+        and not current_user.is_authenticated
+        and '_flashes' not in session
+    )
+
+
+def _settled(stamp):
+    newest = max((value for value in stamp[::2] if value is not None), default=None)
+    return newest is None or datetime.utcnow() - newest > timedelta(seconds=SETTLE_SECONDS)
+
+
+def _replay(body, etag):
+    response = current_app.response_class(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['PAGE_CACHE_TTL']
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+
+def cached_page(view):
+    """Serve `view` from the page cache for anonymous visitors."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_app.config['PAGE_CACHE_TTL'] or not _cacheable():
+            return view(*args, **kwargs)
+
+        stamp = _current_stamp()
+        entry = _pages.get(request.path)
+        if entry is not None and entry[0] == stamp:
+            return _replay(entry[1], entry[2])
+
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.mimetype != 'text/html' or not _settled(stamp):
+            return response
+        body = response.get_data()
+        response.add_etag()
+        etag = response.get_etag()[0]
+        if stamp == _stamp:  # not invalidated while rendering
+            _pages[request.path] = (stamp, body, etag)
+        return _replay(body, etag)
+    return wrapper
+
+
+# ─────────────────────────────────────────────────────────────
+# Route table
+# ─────────────────────────────────────────────────────────────
+
+def normalize_url(url):
+    """``about/`` and ``/about`` both become ``/about``."""
+    return '/' + (url or '').strip().strip('/')
+
+
+class PageRoutes:
+    """Ids of published pages keyed by their configured ``url`` and by ``page_id``,
+    plus the first path segments of those URLs (``prefixes``)."""
+    __slots__ = ('stamp', 'by_url', 'by_slug', 'prefixes')
+
+    def __init__(self, stamp, rows):
+        self.stamp = stamp
+        self.by_url = {normalize_url(url): page_db_id for page_db_id, _, url in rows}
+        self.by_slug = {slug: page_db_id for page_db_id, slug, _ in rows}
+        self.prefixes = {url.split('/', 2)[1] for url in self.by_url}
+
+
+def page_routes():
+    """This worker's route table, rebuilt (one query) when the content stamp moves."""
+    global _routes
+    from models import Page
+    stamp = _current_stamp()
+    routes = _routes
+    if routes is None or routes.stamp != stamp:
+        rows = db.session.query(Page.id, Page.page_id, Page.url).filter(Page.is_published.is_(True)).all()
+        routes = PageRoutes(stamp, rows)
+        if _settled(stamp) and stamp == _stamp:
+            _routes = routes
+    return routes
@@ -0,0 +1,285 @@
+"""On-demand profiling that is safe to switch on briefly in production.
+
+Two modes, started from **Admin → Reports & Analytics → Profiling** and
+picked up by every gunicorn worker within a second:
+
+* **cProfile** — the next N requests (at most ``MAX_REQUESTS``) to one
+  endpoint, e.g. ``game.dashboard``, run under :mod:`cProfile`. Each run is
+  dumped to ``<PROFILE_DIR>/cprofile/`` and the admin page merges them into a
+  single ``.prof`` file for ``snakeviz``/``pstats``.
+* **Sampling** — for a few seconds (at most ``MAX_SECONDS``) a thread in each
+  worker looks at the stacks of threads that are handling a request every
+  ``SAMPLE_INTERVAL`` and counts them. The result is in the collapsed-stack
+  format (``frame;frame;frame count``) read by ``flamegraph.pl`` and
+  speedscope. The overhead is a few microseconds per sample and falls on the
+  sampler thread, not on the request.
+
+Workers coordinate through ``<PROFILE_DIR>/control.json``, which each worker
+stats at most once a second; requests pay nothing else while profiling is off.
+"""
+import cProfile
+import fcntl
+import json
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+
+MAX_REQUESTS = 50
+MAX_SECONDS = 60
+SAMPLE_INTERVAL = 0.005
+CHECK_INTERVAL = 1.0
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_control = {}
+_control_mtime = None
+_checked_at = 0.0
+_sampling_id = None          # sampling session this worker has started
+_request_threads = set()     # idents of threads inside a request
+
+
+def profile_dir():
+    return current_app.config['PROFILE_DIR']
+
+
+@contextmanager
+def locked_control(directory):
+    """Read-modify-write control.json under an exclusive file lock."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'control.json')
+    with open(os.path.join(directory, 'control.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(path) as f:
+                    control = json.load(f)
+            except (OSError, ValueError):
+                control = {}
+            before = json.dumps(control, sort_keys=True)
+            yield control
+            if json.dumps(control, sort_keys=True) != before:
+                tmp = f'{path}.{os.getpid()}'
+                with open(tmp, 'w') as f:
+                    json.dump(control, f)
+                os.replace(tmp, path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def read_control(directory):
+    with locked_control(directory) as control:
+        return dict(control)
+
+
+def current_control(directory):
+    """control.json as of the last check, re-read when its mtime changes."""
+    global _control, _control_mtime, _checked_at
+    now = time.monotonic()
+    if now - _checked_at >= CHECK_INTERVAL:
+        _checked_at = now
+        try:
+            mtime = os.stat(os.path.join(directory, 'control.json')).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != _control_mtime:
+            _control_mtime = mtime
+            _control = read_control(directory) if mtime else {}
+    return _control
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# cProfile for the next N requests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def start_cprofile(directory, endpoint, count):
+    count = max(1, min(int(count), MAX_REQUESTS))
+    with locked_control(directory) as control:
+        control['cprofile'] = {'endpoint': endpoint, 'remaining': count, 'requested': count,
+                               'started': time.time()}
+    _clear(os.path.join(directory, 'cprofile'))
+    return count
+
+
+def _claim_cprofile(directory, endpoint):
+    with locked_control(directory) as control:
+        session = control.get('cprofile')
+        if not session or session['endpoint'] != endpoint or session['remaining'] <= 0:
+            return None
+        session['remaining'] -= 1
+        return session['requested'] - session['remaining']
+
+
+def cprofile_runs(directory):
+    folder = os.path.join(directory, 'cprofile')
+    try:
+        return sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith('.prof'))
+    except OSError:
+        return []
+
+
+def merged_stats(directory):
+    """Every captured run merged into the bytes of one pstats file (None if none)."""
+    runs = cprofile_runs(directory)
+    if not runs:
+        return None
+    return marshal.dumps(pstats.Stats(*runs).stats)  # what Stats.dump_stats writes
+
+
+def top_functions(directory, limit=25):
+    """``[(location, calls, total_s, cumulative_s)]`` by cumulative time across all runs."""
+    runs = cprofile_runs(directory)
+    if not runs:
+        return []
+    stats = pstats.Stats(*runs).stats
+    rows = []
+    for (filename, lineno, name), (_, calls, total, cumulative, _) in stats.items():
+        if filename.startswith(APP_ROOT + os.sep):
+            filename = os.path.relpath(filename, APP_ROOT)
+        location = f'{filename}:{lineno}({name})' if lineno else name
+        rows.append((location, calls, total, cumulative))
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows[:limit]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sampling profiler
+# ─────────────────────────────────────────────────────────────────────────────
+
+def start_sampling(directory, seconds):
+    seconds = max(1, min(int(seconds), MAX_SECONDS))
+    session_id = uuid.uuid4().hex[:16]
+    with locked_control(directory) as control:
+        control['sampling'] = {'id': session_id, 'until': time.time() + seconds, 'seconds': seconds}
+    _clear(os.path.join(directory, 'sampling'))
+    return seconds
+
+
+def _frame_name(frame):
+    filename = frame.f_code.co_filename
+    if filename.startswith(APP_ROOT + os.sep):
+        filename = os.path.relpath(filename, APP_ROOT)
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f'{frame.f_code.co_name} ({filename}:{frame.f_code.co_firstlineno})'
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def _sample(directory, session_id, until):
+    counts = Counter()
+    me = threading.get_ident()
+    next_check = time.time() + CHECK_INTERVAL
+    while time.time() < until:
+        if time.time() >= next_check:  # stopped from the admin page?
+            next_check = time.time() + CHECK_INTERVAL
+            session = read_control(directory).get('sampling', {})
+            until = session.get('until', 0) if session.get('id') == session_id else 0
+        frames = sys._current_frames()
+        for ident in list(_request_threads):
+            frame = frames.get(ident)
+            if frame is not None and ident != me:
+                counts[_collapse(frame)] += 1
+        del frames
+        time.sleep(SAMPLE_INTERVAL)
+
+    folder = os.path.join(directory, 'sampling')
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f'{session_id}-{os.getpid()}.txt'), 'w') as f:
+        for stack, count in counts.items():
+            f.write(f'{stack} {count}\n')
+
+
+def _maybe_start_sampler(directory, session):
+    global _sampling_id
+    if session['id'] == _sampling_id or time.time() >= session['until']:
+        return
+    _sampling_id = session['id']
+    threading.Thread(target=_sample, args=(directory, session['id'], session['until']),
+                     name='profiling-sampler', daemon=True).start()
+
+
+def collapsed_stacks(directory, session_id=None):
+    """Every worker's samples (of `session_id` only, if given) summed into one collapsed-stack text."""
+    folder = os.path.join(directory, 'sampling')
+    counts = Counter()
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        names = []
+    for name in names:
+        if session_id and not name.startswith(f'{session_id}-'):
+            continue
+        with open(os.path.join(folder, name)) as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack and count.isdigit():
+                    counts[stack] += int(count)
+    return ''.join(f'{stack} {count}\n' for stack, count in counts.most_common())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Control and request hooks
+# ─────────────────────────────────────────────────────────────────────────────
+
+def stop(directory):
+    with locked_control(directory) as control:
+        control.pop('cprofile', None)
+        if 'sampling' in control:
+            control['sampling']['until'] = min(control['sampling']['until'], time.time())
+
+
+def _clear(folder):
+    os.makedirs(folder, exist_ok=True)
+    for name in os.listdir(folder):
+        os.remove(os.path.join(folder, name))
+
+
+def init_app(app):
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.root_path, 'logs', 'profiles'))
+
+    @app.before_request
+    def start_profiling():
+        control = current_control(profile_dir())
+        if not control:
+            return
+        sampling = control.get('sampling')
+        if sampling and time.time() < sampling['until']:
+            _request_threads.add(threading.get_ident())
+            _maybe_start_sampler(profile_dir(), sampling)
+        session = control.get('cprofile')
+        if session and session['remaining'] > 0 and session['endpoint'] == request.endpoint:
+            run = _claim_cprofile(profile_dir(), request.endpoint)
+            if run is not None:
+                profiler = cProfile.Profile()
+                try:
+                    profiler.enable()
+                except ValueError:  # another profiler is already active
+                    return
+                g.profiler = (profiler, run)
+
+    @app.teardown_request
+    def finish_profiling(exc):
+        _request_threads.discard(threading.get_ident())
+        profiler, run = g.pop('profiler', (None, None))
+        if profiler is None:
+            return
+        profiler.disable()
+        folder = os.path.join(profile_dir(), 'cprofile')
+        os.makedirs(folder, exist_ok=True)
+        profiler.dump_stats(os.path.join(folder, f'{run:03d}-{os.getpid()}.prof'))
@@ -0,0 +1,166 @@
+"""Structured JSON logs with a request ID.
+
+Every request gets an ID — the ``X-Request-ID`` header set by nginx
+(``proxy_set_header X-Request-ID $request_id``) when present, otherwise a
+fresh one — returned in the ``X-Request-ID`` response header. Each log record
+written during the request, by the app or by a library, carries it along
+with the user and team IDs and the endpoint, and each request ends with one
+``request`` line::
+
+    {"ts": "2026-10-19T09:54:28.295Z", "level": "INFO", "logger": "treasure_hunt.request",
+     "msg": "POST /game/submit-answer 200", "request_id": "5f0c1e9a2b7d4c61", "user_id": 7,
+     "team_id": 3, "endpoint": "game.submit_answer", "status": 200, "latency_ms": 41.7,
+     "db_ms": 3.2, "db_statements": 5, "pid": 1973}
+
+GameLog rows inserted during a request get ``[request <id>]`` appended to
+their details, so an entry in Admin → Game Logs leads straight to the log
+lines of the request (on whichever worker) that wrote it.
+
+``LOG_FORMAT=text`` switches back to plain lines; ``LOG_LEVEL`` sets the level.
+"""
+import json
+import logging
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request, session
+from flask.logging import default_handler
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import NoInspectionAvailable
+
+logger = logging.getLogger('treasure_hunt.request')
+
+_VALID_ID = re.compile(r'^[A-Za-z0-9._-]{8,64}$')
+
+# Attributes every LogRecord has; anything else was passed in `extra=`.
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def current_request_id():
+    return g.get('request_id') if has_request_context() else None
+
+
+def _loaded_user():
+    """(user_id, team_id) of the logged-in user, without emitting SQL.
+
+    After a commit the user's attributes are expired, so the IDs seen while
+    they were last loaded are kept on ``g``.
+    """
+    user = g.get('_login_user')
+    if user is None:
+        return None, None
+    try:
+        state = sa_inspect(user)
+    except NoInspectionAvailable:  # AnonymousUserMixin
+        return None, None
+    if 'team_id' in state.dict:
+        g.log_user = (state.dict.get('id'), state.dict['team_id'])
+    return g.get('log_user') or (state.identity[0] if state.identity else None, None)
+
+
+def _remember_user(target, *args):
+    """Keep the logged-in user's IDs whenever that row is loaded or refreshed."""
+    if not has_request_context():
+        return
+    loaded = sa_inspect(target).dict
+    if g.get('_login_user') is target or str(loaded.get('id')) == session.get('_user_id'):
+        if 'team_id' in loaded:
+            g.log_user = (loaded.get('id'), loaded['team_id'])
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id, user_id, team_id and endpoint to records made in a request."""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.user_id, record.team_id = _loaded_user()
+            record.endpoint = request.endpoint
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields become top-level keys."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                entry[key] = value
+        entry['pid'] = record.process
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _tag_game_log(mapper, connection, target):
+    request_id = current_request_id()
+    if request_id and request_id not in (target.details or ''):
+        target.details = f'{target.details} [request {request_id}]' if target.details else f'[request {request_id}]'
+
+
+def configure_logging(log_format='json', level='INFO'):
+    """Send the root logger (and so Flask's and the libraries') to stderr in `log_format`."""
+    root = logging.getLogger()
+    handler = next((h for h in root.handlers if getattr(h, 'request_log', False)), None)
+    if handler is None:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.request_log = True
+        handler.addFilter(RequestContextFilter())
+        root.addHandler(handler)
+    handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(
+        '%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'))
+    root.setLevel(level)
+
+
+def init_app(app):
+    from models import GameLog, User
+
+    app.config.setdefault('LOG_FORMAT', 'json')
+    app.config.setdefault('LOG_LEVEL', 'INFO')
+    configure_logging(app.config['LOG_FORMAT'], app.config['LOG_LEVEL'])
+    app.logger.removeHandler(default_handler)  # records go to the root handler instead
+
+    if not event.contains(GameLog, 'before_insert', _tag_game_log):
+        event.listen(GameLog, 'before_insert', _tag_game_log)
+        event.listen(User, 'load', _remember_user)
+        event.listen(User, 'refresh', _remember_user)
+
+    @app.before_request
+    def assign_request_id():
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming if _VALID_ID.match(incoming) else uuid.uuid4().hex[:16]
+        g.request_started_at = time.perf_counter()
+
+    # Registered before the other hooks, so this runs after all of theirs.
+    @app.after_request
+    def log_request(response):
+        started = g.get('request_started_at')
+        if started is None:
+            return response
+        response.headers['X-Request-ID'] = g.request_id
+        stats = g.get('query_stats')
+        # Load-balancer probes would drown everything else out.
+        logger.log(
+            logging.DEBUG if request.blueprint == 'health' else logging.INFO,
+            '%s %s %s', request.method, request.path, response.status_code,
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+                'db_ms': round(stats.total * 1000, 1) if stats else None,
+                'db_statements': stats.count if stats else None,
+                'remote_addr': request.remote_addr,
+            },
+        )
+        return response
@@ -0,0 +1,217 @@
+"""Sanitize and minify admin-authored HTML once, at save time.
+
+Question text, explanations and CMS bodies are written by admins (mostly via
+Summernote) and emitted with ``| safe``. Rendering them through here when the
+row is saved means templates can output a ready fragment: disallowed tags and
+attributes are dropped, script-ish URLs are removed, unclosed tags are closed
+so a stray ``<div>`` can no longer swallow the page layout, and insignificant
+whitespace and comments are stripped. Summernote's video button inserts an
+``<iframe>``; it is kept only when it points at a YouTube or Vimeo player, and
+is re-emitted with a fixed attribute set.
+
+The model hooks live in models.py; each row stores a hash of its raw fields so
+unchanged content is never re-rendered.
+"""
+import hashlib
+import re
+from html import escape
+from html.parser import HTMLParser
+
+# Bump when the rules below change so stored fragments get re-rendered.
+RENDERER_VERSION = '2'
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'code', 'col', 'colgroup',
+    'dd', 'del', 'div', 'dl', 'dt', 'em', 'figcaption', 'figure', 'font',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'ins', 'kbd', 'li',
+    'mark', 'ol', 'p', 'pre', 'q', 's', 'small', 'span', 'strike', 'strong',
+    'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+VOID_TAGS = {'br', 'col', 'hr', 'img'}
+# Tags whose whole content is dropped, not just the tag itself (a video
+# iframe is re-emitted whole by _Sanitizer._embed first).
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'noscript', 'template', 'title'}
+
+GLOBAL_ATTRS = {'class', 'style', 'title', 'dir', 'lang'}
+TAG_ATTRS = {
+    'a': {'href', 'target', 'rel'},
+    'img': {'src', 'alt', 'width', 'height', 'loading'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'col': {'span'},
+    'colgroup': {'span'},
+    'ol': {'start', 'type'},
+    'font': {'color', 'face', 'size'},
+}
+URL_ATTRS = {'href', 'src'}
+SAFE_URL_SCHEMES = ('http:', 'https:', 'mailto:', 'tel:')
+
+# Video embeds: players allowed in an iframe's src, and what is copied from it.
+EMBED_URL_PREFIXES = ('https://www.youtube.com/embed/', 'https://player.vimeo.com/video/')
+EMBED_ATTRS = {'width', 'height', 'class', 'title'}
+EMBED_FIXED_ATTRS = ('frameborder="0" allow="fullscreen; picture-in-picture" allowfullscreen '
+                     'loading="lazy" referrerpolicy="strict-origin-when-cross-origin"')
+
+_WHITESPACE = re.compile(r'\s+')
+# Summernote embeds pasted images as data URIs; allow raster formats only.
+_DATA_IMAGE = re.compile(r'^data:image/(png|jpe?g|gif|webp);base64,[a-z0-9+/=\s]+$', re.IGNORECASE)
+_UNSAFE_CSS = re.compile(r'expression|javascript:|url\s*\(|behavior|position\s*:', re.IGNORECASE)
+_DIMENSION = re.compile(r'^\d{1,4}%?$')
+
+
+def content_hash(*values):
+    """Stable hash of the raw field values plus the renderer version."""
+    digest = hashlib.sha256(RENDERER_VERSION.encode())
+    for value in values:
+        digest.update(b'\x00')
+        digest.update((value or '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _safe_url(value):
+    url = value.strip()
+    compact = re.sub(r'[\s\x00-\x1f]', '', url).lower()
+    if ':' in compact.split('/', 1)[0] and not compact.startswith(SAFE_URL_SCHEMES):
+        return None  # javascript:, data:, vbscript: …
+    return url
+
+
+def _embed_url(value):
+    """`value` as an https player URL if it is a YouTube/Vimeo embed, else None."""
+    url = re.sub(r'[\s\x00-\x1f]', '', value)
+    if url.startswith('//'):
+        url = 'https:' + url  # Summernote writes protocol-relative URLs
+    elif url.startswith('http://'):
+        url = 'https://' + url[len('http://'):]
+    return url if url.startswith(EMBED_URL_PREFIXES) else None
+
+
+def _safe_style(value):
+    kept = [decl.strip() for decl in value.split(';') if decl.strip() and not _UNSAFE_CSS.search(decl)]
+    return '; '.join(kept) or None
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []
+        self.dropping = 0
+        self.in_pre = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'iframe' and not self.dropping:
+            self._embed(attrs)
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+
+        allowed = GLOBAL_ATTRS | TAG_ATTRS.get(tag, set())
+        parts = [tag]
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if tag == 'img' and name == 'src' and _DATA_IMAGE.match(value):
+                pass
+            elif name in URL_ATTRS:
+                value = _safe_url(value)
+            elif name == 'style':
+                value = _safe_style(value)
+            if value is None:
+                continue
+            parts.append(f'{name}="{escape(value, quote=True)}"')
+        if tag == 'a' and any(p.startswith('target=') for p in parts):
+            parts = [p for p in parts if not p.startswith('rel=')] + ['rel="noopener noreferrer"']
+
+        self.out.append('<' + ' '.join(parts) + '>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+            if tag == 'pre':
+                self.in_pre += 1
+
+    def _embed(self, attrs):
+        """Emit a whole video iframe (its content and end tag are then dropped)."""
+        attrs = dict(attrs)
+        src = _embed_url(attrs.get('src') or '')
+        if src is None:
+            return
+        parts = ['iframe', f'src="{escape(src, quote=True)}"']
+        for name in sorted(EMBED_ATTRS):
+            value = attrs.get(name)
+            if value is None or (name in ('width', 'height') and not _DIMENSION.match(value.strip())):
+                continue
+            parts.append(f'{name}="{escape(value.strip(), quote=True)}"')
+        self.out.append('<' + ' '.join(parts) + ' ' + EMBED_FIXED_ATTRS + '></iframe>')
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in DROP_CONTENT_TAGS:
+            self.handle_endtag(tag)
+        elif tag in self.open_tags and tag not in VOID_TAGS and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return  # stray closing tag — ignore rather than close our parents
+        # Close anything left open inside this element first.
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.out.append(f'</{open_tag}>')
+            if open_tag == 'pre':
+                self.in_pre -= 1
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        if not self.in_pre:
+            data = _WHITESPACE.sub(' ', data)
+        self.out.append(escape(data, quote=False))
+
+    def handle_comment(self, data):
+        pass  # comments are dropped
+
+    def result(self):
+        self.close()
+        while self.open_tags:
+            self.out.append(f'</{self.open_tags.pop()}>')
+        return ''.join(self.out).strip()
+
+
+def render_rich_text(raw):
+    """Return a sanitized, minified fragment for `raw` (None stays None)."""
+    if raw is None:
+        return None
+    parser = _Sanitizer()
+    parser.feed(raw)
+    return parser.result()
+
+
+def rich_html(rendered, raw):
+    """The stored fragment for output with ``| safe``.
+
+    A row saved before its ``*_html`` column was filled has `rendered` None;
+    its raw field is sanitized now rather than emitted as is. An empty
+    fragment (raw content that was nothing but a script, say) stays empty.
+    """
+    return rendered if rendered is not None else render_rich_text(raw)
+
+
+def refresh_rendered(target, fields):
+    """Re-render `target`'s HTML columns if their raw sources changed.
+
+    `fields` maps raw attribute name → rendered attribute name; the target
+    must have an ``html_hash`` column.
+    """
+    digest = content_hash(*(getattr(target, raw) for raw in fields))
+    if target.html_hash == digest:
+        return
+    for raw, rendered in fields.items():
+        setattr(target, rendered, render_rich_text(getattr(target, raw)))
+    target.html_hash = digest
@@ -16,4 +16,10 @@ from routes.admin import (  # noqa: E402,F401
     settings,
     cms,
     reports,
+    uploads,
+    jobs,
+    performance,
+    slow_log,
+    profiling,
+    memory,
 )
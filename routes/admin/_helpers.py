@@ -1,12 +1,10 @@
 """Shared decorators and utilities for the admin blueprint."""
-import os
 import secrets
 import string
 from functools import wraps
 
 from flask import flash, redirect, url_for
 from flask_login import current_user
-from werkzeug.utils import secure_filename
 
 from app import db
 from models import GameLog
@@ -41,8 +39,3 @@ def _safe_int(value, default: int = 0, minimum: int = 0) -> int:
     except (TypeError, ValueError):
         return default
 
-
-def _unique_filename(original_filename):
-    """Generate a collision-safe filename using a random hex prefix."""
-    ext = os.path.splitext(secure_filename(original_filename))[1]
-    return f"{secrets.token_hex(12)}{ext}"
@@ -2,6 +2,7 @@ from flask import flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
 from app import db
+from catalog import bump_catalog_version
 from models import Clue, Question
 from routes.admin import admin_bp
 from routes.admin._helpers import admin_required, _safe_int
@@ -25,6 +26,7 @@ def manage_clues(question_id):
 
         clue = Clue(question_id=question_id, clue_text=clue_text, explanation=explanation, clue_order=next_order)
         db.session.add(clue)
+        bump_catalog_version()
         db.session.commit()
         flash('Clue added successfully!', 'success')
         return redirect(url_for('admin.manage_clues', question_id=question_id))
@@ -59,6 +61,7 @@ def edit_clue(clue_id):
         clue.clue_text = clue_text
         clue.explanation = (request.form.get('explanation') or '').strip() or None
         clue.clue_order = new_order
+        bump_catalog_version()
         db.session.commit()
         flash('Clue updated successfully!', 'success')
         return redirect(url_for('admin.manage_clues', question_id=question.id))
@@ -86,6 +89,7 @@ def delete_clue(clue_id):
     for c in remaining:
         c.clue_order -= 1
 
+    bump_catalog_version()
     db.session.commit()
     flash('Clue deleted and remaining clues reordered.', 'success')
     return redirect(url_for('admin.manage_clues', question_id=question_id))
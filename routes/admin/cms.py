@@ -1,9 +1,11 @@
 """Home page content, static pages, and menu item management."""
-from flask import flash, redirect, render_template, request, url_for
+from flask import current_app, flash, redirect, render_template, request, url_for
+from werkzeug.exceptions import HTTPException
 from flask_login import login_required
 
 from app import db
 from models import MenuItem, Page, SiteContent
+from page_cache import invalidate_pages, normalize_url
 from routes.admin import admin_bp
 from routes.admin._helpers import admin_required
 
@@ -31,6 +33,7 @@ def site_content():
             db.session.add(content)
 
         db.session.commit()
+        invalidate_pages()
         flash('Home page content updated successfully!', 'success')
         return redirect(url_for('admin.site_content'))
 
@@ -41,6 +44,15 @@ def site_content():
 # Pages Management
 # ─────────────────────────────────────────────────────────────
 
+def _url_reserved(url):
+    """True if one of the app's own routes already answers at `url`."""
+    try:
+        endpoint, _ = current_app.url_map.bind('').match(url)
+    except HTTPException:
+        return False
+    return endpoint != 'public.page_at_url'
+
+
 @admin_bp.route('/pages')
 @login_required
 @admin_required
@@ -60,8 +72,10 @@ def add_page():
         content = request.form.get('content', '').strip()
         is_published = request.form.get('is_published') == 'on'
 
-        if not url.startswith('/'):
-            url = '/' + url
+        url = normalize_url(url)
+        if _url_reserved(url):
+            flash('That URL is already used by the site itself.', 'danger')
+            return redirect(url_for('admin.add_page'))
 
         if Page.query.filter_by(page_id=page_id).first():
             flash('A page with that Page ID already exists.', 'danger')
@@ -74,6 +88,7 @@ def add_page():
         page = Page(page_id=page_id, url=url, title=title, content=content, is_published=is_published)
         db.session.add(page)
         db.session.commit()
+        invalidate_pages()
         flash(f'Page "{title}" created successfully!', 'success')
         return redirect(url_for('admin.manage_pages'))
 
@@ -87,16 +102,27 @@ def edit_page(page_db_id):
     page = Page.query.get_or_404(page_db_id)
 
     if request.method == 'POST':
-        page.page_id = request.form.get('page_id', '').strip().lower()
-        page.url = request.form.get('url', '').strip()
+        page_id = request.form.get('page_id', '').strip().lower()
+        url = normalize_url(request.form.get('url', ''))
+
+        if _url_reserved(url):
+            flash('That URL is already used by the site itself.', 'danger')
+            return redirect(url_for('admin.edit_page', page_db_id=page.id))
+        if Page.query.filter(Page.page_id == page_id, Page.id != page.id).first():
+            flash('A page with that Page ID already exists.', 'danger')
+            return redirect(url_for('admin.edit_page', page_db_id=page.id))
+        if Page.query.filter(Page.url == url, Page.id != page.id).first():
+            flash('A page with that URL already exists.', 'danger')
+            return redirect(url_for('admin.edit_page', page_db_id=page.id))
+
+        page.page_id = page_id
+        page.url = url
         page.title = request.form.get('title', '').strip()
         page.content = request.form.get('content', '').strip()
         page.is_published = request.form.get('is_published') == 'on'
 
-        if not page.url.startswith('/'):
-            page.url = '/' + page.url
-
         db.session.commit()
+        invalidate_pages()
         flash(f'Page "{page.title}" updated successfully!', 'success')
         return redirect(url_for('admin.manage_pages'))
 
@@ -111,6 +137,7 @@ def delete_page(page_db_id):
     title = page.title
     db.session.delete(page)
     db.session.commit()
+    invalidate_pages()
     flash(f'Page "{title}" deleted.', 'success')
     return redirect(url_for('admin.manage_pages'))
 
@@ -139,6 +166,7 @@ def add_menu_item():
     item = MenuItem(text=text, link=link, position=position, is_active=is_active)
     db.session.add(item)
     db.session.commit()
+    invalidate_pages()
     flash(f'Menu item "{text}" added!', 'success')
     return redirect(url_for('admin.manage_menu'))
 
@@ -153,6 +181,7 @@ def edit_menu_item(item_id):
     item.position = int(request.form.get('position', 0))
     item.is_active = request.form.get('is_active') == 'on'
     db.session.commit()
+    invalidate_pages()
     flash(f'Menu item "{item.text}" updated!', 'success')
     return redirect(url_for('admin.manage_menu'))
 
@@ -165,5 +194,6 @@ def delete_menu_item(item_id):
     text = item.text
     db.session.delete(item)
     db.session.commit()
+    invalidate_pages()
     flash(f'Menu item "{text}" deleted.', 'success')
     return redirect(url_for('admin.manage_menu'))
@@ -1,5 +1,6 @@
 from flask import render_template
 from flask_login import login_required
+from sqlalchemy.orm import selectinload
 
 from app import db
 from models import GameConfig, Level, Team, ClueUsage
@@ -12,8 +13,9 @@ from routes.admin._helpers import admin_required
 @admin_required
 def dashboard():
     config = GameConfig.query.first()
-    levels = Level.query.order_by(Level.level_number).all()
-    teams = Team.query.all()
+    # The template reads level.questions and team.members per row; load them up front.
+    levels = Level.query.options(selectinload(Level.questions)).order_by(Level.level_number).all()
+    teams = Team.query.options(selectinload(Team.members)).all()
 
     # Pre-aggregate clue usage in one bulk query so the template
     # never calls team.clues_remaining (2 queries × N teams) in a loop.
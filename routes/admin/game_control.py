@@ -2,6 +2,8 @@ from flask import flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
 from app import db
+from catalog import bump_catalog_version, get_catalog
+from jobs import enqueue
 from models import GameConfig, GameLog, Level, Question, Team
 from routes.admin import admin_bp
 from routes.admin._helpers import admin_required, _safe_int, log_game_action
@@ -41,6 +43,7 @@ def initialize_game():
 
         retain_questions = request.form.get('retain_questions') == 'on'
         existing_count = Level.query.count()
+        released = []  # uploads of deleted questions; freed by a background job
 
         if existing_count > num_levels:
             levels_to_remove = Level.query.filter(Level.level_number > num_levels).all()
@@ -54,16 +57,9 @@ def initialize_game():
                     )
                 else:
                     # Delete questions (and their files) permanently
-                    import os
                     for q in Question.query.filter_by(level_id=lvl.id).all():
-                        if q.media_url:
-                            disk_path = os.path.join('static', q.media_url)
-                            if os.path.exists(disk_path):
-                                os.remove(disk_path)
-                        for media in q.media_files:
-                            disk_path = os.path.join('static', media.media_url)
-                            if os.path.exists(disk_path):
-                                os.remove(disk_path)
+                        released.append((q.media_url, q.media_variants))
+                        released += [(media.media_url, media.variants) for media in q.media_files]
                     Question.query.filter_by(level_id=lvl.id).delete(synchronize_session='fetch')
                 db.session.delete(lvl)
 
@@ -102,6 +98,9 @@ def initialize_game():
             GameLog.query.delete()
             log_note = f" {log_count} pre-game log(s) cleared."
 
+        if released:
+            enqueue('release_uploads', {'uploads': released})
+        bump_catalog_version()
         db.session.commit()
 
         log_game_action(
@@ -149,8 +148,12 @@ def start_game():
     config.current_level = 1
     for level in levels:
         level.is_active = True
+    bump_catalog_version()
     db.session.commit()
 
+    # Build this worker's question catalog now rather than on the first play request
+    get_catalog(config)
+
     log_game_action(
         'GAME_STARTED',
         details=f'Game started with {teams_count} team(s). All levels activated simultaneously.',
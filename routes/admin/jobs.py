@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from flask import flash, redirect, render_template, url_for
+from flask_login import login_required
+
+from app import db
+from models import Job
+from routes.admin import admin_bp
+from routes.admin._helpers import admin_required
+
+
+@admin_bp.route('/jobs')
+@login_required
+@admin_required
+def jobs():
+    recent = Job.query.order_by(Job.id.desc()).limit(100).all()
+    counts = dict(db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all())
+    oldest_queued = (
+        db.session.query(db.func.min(Job.created_at))
+        .filter(Job.status == 'queued', Job.attempts == 0)
+        .scalar()
+    )
+    waiting_minutes = int((datetime.utcnow() - oldest_queued).total_seconds() // 60) if oldest_queued else 0
+    return render_template(
+        'admin/jobs.html',
+        jobs=recent,
+        counts=counts,
+        waiting_minutes=waiting_minutes,
+    )
+
+
+@admin_bp.route('/jobs/<int:job_id>/retry', methods=['POST'])
+@login_required
+@admin_required
+def retry_job(job_id):
+    job = Job.query.get_or_404(job_id)
+    if job.status != 'failed':
+        flash('Only failed jobs can be retried.', 'warning')
+    else:
+        job.status = 'queued'
+        job.attempts = 0
+        job.progress = 0
+        job.run_after = datetime.utcnow()
+        job.finished_at = None
+        job.message = 'Retry requested.'
+        db.session.commit()
+        flash(f'Job #{job.id} queued again.', 'success')
+    return redirect(url_for('admin.jobs'))
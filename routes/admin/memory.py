@@ -0,0 +1,78 @@
+import time
+from datetime import datetime
+
+from flask import flash, redirect, render_template, request, url_for
+from flask_login import login_required
+
+import memory as diagnostics
+import profiling
+from routes.admin import admin_bp
+from routes.admin._helpers import admin_required
+
+
+@admin_bp.route('/memory')
+@login_required
+@admin_required
+def memory():
+    directory = profiling.profile_dir()
+    session = profiling.read_control(directory).get('tracemalloc')
+    snapshots = diagnostics.snapshots(directory)
+    ids = list(snapshots)
+
+    # Diff the chosen pair (default: the two newest) for every worker in both.
+    after_id = request.args.get('after') or (ids[0] if ids else None)
+    before_id = request.args.get('before') or (ids[1] if len(ids) > 1 else None)
+    diffs = []
+    if before_id in snapshots and after_id in snapshots and before_id != after_id:
+        for pid, after in sorted(snapshots[after_id].items()):
+            before = snapshots[before_id].get(pid)
+            if before is not None:
+                diffs.append({
+                    'pid': pid,
+                    'total_delta': after['total'] - before['total'],
+                    'ours': diagnostics.diff(before, after, 'ours'),
+                    'libraries': diagnostics.diff(before, after, 'libraries', limit=10),
+                })
+    workers = diagnostics.worker_statuses(directory)
+    for worker in workers:
+        worker['updated'] = datetime.fromtimestamp(worker['updated'])
+    latest = sorted(snapshots[ids[0]].values(), key=lambda s: s['pid']) if ids else []
+
+    return render_template(
+        'admin/memory.html',
+        workers=workers,
+        tracing_left=max(0, int((session['until'] - time.time()) // 60)) if session else 0,
+        tracing=bool(session) and session['until'] > time.time(),
+        snapshot_ids=ids,
+        before_id=before_id,
+        after_id=after_id,
+        diffs=diffs,
+        latest=latest,
+        max_minutes=diagnostics.MAX_MINUTES,
+    )
+
+
+@admin_bp.route('/memory/tracing', methods=['POST'])
+@login_required
+@admin_required
+def memory_tracing():
+    directory = profiling.profile_dir()
+    if request.form.get('action') == 'stop':
+        diagnostics.disable_tracing(directory)
+        flash('Allocation tracing switched off.', 'info')
+    else:
+        minutes = diagnostics.enable_tracing(directory, request.form.get('minutes', type=int) or 15)
+        flash(f'Allocation tracing on for {minutes} minutes; workers start it on their next request.', 'success')
+    return redirect(url_for('admin.memory'))
+
+
+@admin_bp.route('/memory/snapshot', methods=['POST'])
+@login_required
+@admin_required
+def memory_snapshot():
+    snapshot_id = diagnostics.request_snapshot(profiling.profile_dir())
+    if snapshot_id is None:
+        flash('Switch allocation tracing on first.', 'warning')
+    else:
+        flash(f'Snapshot {snapshot_id} requested; each worker takes it after its next request.', 'success')
+    return redirect(url_for('admin.memory'))
@@ -0,0 +1,37 @@
+import json
+
+from flask import current_app, render_template
+from flask_login import login_required
+
+from metrics import Counter, latency_summary
+from tracing import phase_summary, recent_traces
+from routes.admin import admin_bp
+from routes.admin._helpers import admin_required
+
+
+TRACED_ENDPOINTS = ('game.dashboard', 'game.submit_answer')
+
+
+@admin_bp.route('/performance')
+@login_required
+@admin_required
+def performance():
+    return render_template(
+        'admin/performance.html',
+        gameplay=latency_summary('game.'),
+        other=[row for row in latency_summary() if not row['endpoint'].startswith('game.')],
+        metrics_available=Counter is not None,
+        phases=phase_summary(recent_traces(), TRACED_ENDPOINTS),
+        trace_rate=current_app.config['TRACE_SAMPLE_RATE'],
+    )
+
+
+@admin_bp.route('/traces.json')
+@login_required
+@admin_required
+def download_traces():
+    """Recent sampled traces as OTLP/JSON lines, one trace per line."""
+    body = ''.join(json.dumps(trace) + '\n' for trace in recent_traces())
+    return current_app.response_class(body, mimetype='application/x-ndjson', headers={
+        'Content-Disposition': 'attachment; filename=traces.jsonl',
+    })
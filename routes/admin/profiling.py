@@ -0,0 +1,94 @@
+import time
+from datetime import datetime
+
+from flask import current_app, flash, redirect, render_template, request, url_for
+from flask_login import login_required
+
+import profiling as profiler
+from routes.admin import admin_bp
+from routes.admin._helpers import admin_required
+
+
+def _endpoints():
+    return sorted({rule.endpoint for rule in current_app.url_map.iter_rules() if rule.endpoint != 'static'})
+
+
+@admin_bp.route('/profiling')
+@login_required
+@admin_required
+def profiling():
+    directory = profiler.profile_dir()
+    control = profiler.read_control(directory)
+    sampling = control.get('sampling')
+    stacks = profiler.collapsed_stacks(directory, sampling and sampling['id'])
+    return render_template(
+        'admin/profiling.html',
+        endpoints=_endpoints(),
+        cprofile=control.get('cprofile'),
+        cprofile_runs=len(profiler.cprofile_runs(directory)),
+        top_functions=profiler.top_functions(directory),
+        sampling=sampling,
+        sampling_left=max(0, int(sampling['until'] - time.time())) if sampling else 0,
+        sample_count=sum(int(line.rpartition(' ')[2]) for line in stacks.splitlines()),
+        max_requests=profiler.MAX_REQUESTS,
+        max_seconds=profiler.MAX_SECONDS,
+    )
+
+
+@admin_bp.route('/profiling/cprofile', methods=['POST'])
+@login_required
+@admin_required
+def start_cprofile():
+    endpoint = request.form.get('endpoint', '')
+    if endpoint not in _endpoints():
+        flash('Choose an endpoint to profile.', 'danger')
+    else:
+        count = profiler.start_cprofile(profiler.profile_dir(), endpoint, request.form.get('count', type=int) or 10)
+        flash(f'Profiling the next {count} requests to {endpoint}.', 'success')
+    return redirect(url_for('admin.profiling'))
+
+
+@admin_bp.route('/profiling/sampling', methods=['POST'])
+@login_required
+@admin_required
+def start_sampling():
+    seconds = profiler.start_sampling(profiler.profile_dir(), request.form.get('seconds', type=int) or 10)
+    flash(f'Sampling request stacks on every worker for {seconds} seconds.', 'success')
+    return redirect(url_for('admin.profiling'))
+
+
+@admin_bp.route('/profiling/stop', methods=['POST'])
+@login_required
+@admin_required
+def stop_profiling():
+    profiler.stop(profiler.profile_dir())
+    flash('Profiling stopped.', 'info')
+    return redirect(url_for('admin.profiling'))
+
+
+@admin_bp.route('/profiling/cprofile.prof')
+@login_required
+@admin_required
+def download_cprofile():
+    data = profiler.merged_stats(profiler.profile_dir())
+    if data is None:
+        flash('No profiled requests yet.', 'warning')
+        return redirect(url_for('admin.profiling'))
+    return current_app.response_class(data, mimetype='application/octet-stream', headers={
+        'Content-Disposition': f'attachment; filename=profile-{datetime.now():%Y%m%d-%H%M%S}.prof',
+    })
+
+
+@admin_bp.route('/profiling/stacks.txt')
+@login_required
+@admin_required
+def download_stacks():
+    directory = profiler.profile_dir()
+    sampling = profiler.read_control(directory).get('sampling')
+    stacks = profiler.collapsed_stacks(directory, sampling and sampling['id'])
+    if not stacks:
+        flash('No stacks sampled yet.', 'warning')
+        return redirect(url_for('admin.profiling'))
+    return current_app.response_class(stacks, mimetype='text/plain', headers={
+        'Content-Disposition': f'attachment; filename=stacks-{datetime.now():%Y%m%d-%H%M%S}.txt',
+    })
@@ -1,19 +1,39 @@
-import os
-
 from flask import flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
 from app import db
+from catalog import bump_catalog_version
+from jobs import enqueue
+from media import claim_upload, needs_processing, save_upload
 from models import GameConfig, Level, Question, QuestionMedia
 from routes.admin import admin_bp
 from routes.admin._helpers import (
     admin_required,
     _safe_int,
-    _unique_filename,
     log_game_action,
 )
 
 
+def _incoming_upload(field):
+    """Stored file for `field`, posted directly or via a chunked upload session.
+
+    Returns ``(media_url, width, height, variants_json)`` or None. New images
+    come back without dimensions; a ``process_media`` job is queued for them.
+    """
+    upload_id = request.form.get(f'{field}_upload')
+    file = request.files.get(field)
+    if upload_id:
+        upload = claim_upload(upload_id)
+    elif file and file.filename:
+        upload = save_upload(file)
+    else:
+        return None
+    if upload and upload[3] is None and needs_processing(upload[0]):
+        # Derivatives are made in the background and filled in on every row using the file.
+        enqueue('process_media', {'media_url': upload[0]})
+    return upload
+
+
 @admin_bp.route('/questions/pool')
 @login_required
 @admin_required
@@ -67,6 +87,7 @@ def move_question():
         for i, q in enumerate(remaining, start=1):
             q.question_number = i
 
+    bump_catalog_version()
     db.session.commit()
     flash('Question moved successfully.', 'success')
     return redirect(url_for('admin.assign_questions'))
@@ -82,6 +103,7 @@ def reorder_questions(level_id):
         return {'ok': False, 'error': 'Invalid payload'}, 400
     for index, qid in enumerate(ids, start=1):
         Question.query.filter_by(id=int(qid), level_id=level_id).update({'question_number': index})
+    bump_catalog_version()
     db.session.commit()
     return {'ok': True}
 
@@ -115,17 +137,12 @@ def add_question(level_id):
         max_q = Question.query.filter_by(level_id=level_id).order_by(Question.question_number.desc()).first()
         next_number = (max_q.question_number + 1) if max_q else 1
 
-        media_url = None
-        if 'question_image' in request.files:
-            file = request.files['question_image']
-            if file and file.filename:
-                unique_filename = _unique_filename(file.filename)
-                upload_folder = os.path.join('static', 'uploads')
-                os.makedirs(upload_folder, exist_ok=True)
-                file.save(os.path.join(upload_folder, unique_filename))
-                media_url = f"uploads/{unique_filename}"
-                if question_type == 'text':
-                    question_type = 'image'
+        media_url = media_width = media_height = media_variants = None
+        upload = _incoming_upload('question_image')
+        if upload:
+            media_url, media_width, media_height, media_variants = upload
+            if question_type == 'text':
+                question_type = 'image'
 
         question = Question(
             level_id=level_id,
@@ -135,6 +152,9 @@ def add_question(level_id):
             answer=answer,
             points=points,
             media_url=media_url,
+            media_width=media_width,
+            media_height=media_height,
+            media_variants=media_variants,
         )
         db.session.add(question)
         db.session.commit()
@@ -142,21 +162,20 @@ def add_question(level_id):
         for i in range(num_media):
             media_type = request.form.get(f'media_type_{i}')
             media_caption = request.form.get(f'media_caption_{i}', '')
-            file_key = f'media_file_{i}'
-            if file_key in request.files:
-                file = request.files[file_key]
-                if file and file.filename:
-                    unique_filename = _unique_filename(file.filename)
-                    upload_folder = os.path.join('static', 'uploads', 'media')
-                    os.makedirs(upload_folder, exist_ok=True)
-                    file.save(os.path.join(upload_folder, unique_filename))
-                    db.session.add(QuestionMedia(
-                        question_id=question.id,
-                        media_type=media_type,
-                        media_url=f"uploads/media/{unique_filename}",
-                        media_caption=media_caption,
-                        display_order=i,
-                    ))
+            upload = _incoming_upload(f'media_file_{i}')
+            if upload:
+                url, width, height, variants = upload
+                db.session.add(QuestionMedia(
+                    question_id=question.id,
+                    media_type=media_type,
+                    media_url=url,
+                    media_caption=media_caption,
+                    width=width,
+                    height=height,
+                    variants=variants,
+                    display_order=i,
+                ))
+        bump_catalog_version()
         db.session.commit()
 
         log_game_action('QUESTION_ADDED', details=f'Question {next_number} added to Level {level.level_number}.')
@@ -192,50 +211,46 @@ def edit_question(question_id):
         question.points = _safe_int(request.form.get('points'), default=10, minimum=0)
         question.explanation = (request.form.get('explanation') or '').strip() or None
         num_media = _safe_int(request.form.get('num_media'), default=0, minimum=0)
+        released = []  # uploads this edit stops referencing; freed by a background job
 
         if request.form.get('remove_image') == 'true':
-            if question.media_url:
-                disk_path = os.path.join('static', question.media_url)
-                if os.path.exists(disk_path):
-                    os.remove(disk_path)
+            released.append((question.media_url, question.media_variants))
             question.media_url = None
-        elif 'question_image' in request.files:
-            file = request.files['question_image']
-            if file and file.filename:
-                unique_filename = _unique_filename(file.filename)
-                upload_folder = os.path.join('static', 'uploads')
-                os.makedirs(upload_folder, exist_ok=True)
-                file.save(os.path.join(upload_folder, unique_filename))
-                question.media_url = f"uploads/{unique_filename}"
+            question.media_width = question.media_height = question.media_variants = None
+        else:
+            upload = _incoming_upload('question_image')
+            if upload:
+                released.append((question.media_url, question.media_variants))
+                (question.media_url, question.media_width,
+                 question.media_height, question.media_variants) = upload
 
         for media_id in request.form.getlist('delete_media'):
             media = QuestionMedia.query.get(_safe_int(media_id))
             if media and media.question_id == question.id:
-                disk_path = os.path.join('static', media.media_url)
-                if os.path.exists(disk_path):
-                    os.remove(disk_path)
+                released.append((media.media_url, media.variants))
                 db.session.delete(media)
 
         max_order = db.session.query(db.func.max(QuestionMedia.display_order)).filter_by(question_id=question.id).scalar() or 0
         for i in range(num_media):
             media_type = request.form.get(f'media_type_{i}')
             media_caption = request.form.get(f'media_caption_{i}', '')
-            file_key = f'media_file_{i}'
-            if file_key in request.files:
-                file = request.files[file_key]
-                if file and file.filename:
-                    unique_filename = _unique_filename(file.filename)
-                    upload_folder = os.path.join('static', 'uploads', 'media')
-                    os.makedirs(upload_folder, exist_ok=True)
-                    file.save(os.path.join(upload_folder, unique_filename))
-                    db.session.add(QuestionMedia(
-                        question_id=question.id,
-                        media_type=media_type,
-                        media_url=f"uploads/media/{unique_filename}",
-                        media_caption=media_caption,
-                        display_order=max_order + i + 1,
-                    ))
-
+            upload = _incoming_upload(f'media_file_{i}')
+            if upload:
+                url, width, height, variants = upload
+                db.session.add(QuestionMedia(
+                    question_id=question.id,
+                    media_type=media_type,
+                    media_url=url,
+                    media_caption=media_caption,
+                    width=width,
+                    height=height,
+                    variants=variants,
+                    display_order=max_order + i + 1,
+                ))
+
+        if released:
+            enqueue('release_uploads', {'uploads': released})
+        bump_catalog_version()
         db.session.commit()
         log_game_action(
             'QUESTION_UPDATED',
@@ -264,14 +279,8 @@ def delete_question(question_id):
         )
         return redirect(url_for('admin.manage_questions', level_id=level_id))
 
-    if question.media_url:
-        disk_path = os.path.join('static', question.media_url)
-        if os.path.exists(disk_path):
-            os.remove(disk_path)
-    for media in question.media_files:
-        disk_path = os.path.join('static', media.media_url)
-        if os.path.exists(disk_path):
-            os.remove(disk_path)
+    released = [(question.media_url, question.media_variants)]
+    released += [(media.media_url, media.variants) for media in question.media_files]
 
     db.session.delete(question)
     db.session.flush()
@@ -285,6 +294,9 @@ def delete_question(question_id):
     for q in subsequent:
         q.question_number -= 1
 
+    if released:
+        enqueue('release_uploads', {'uploads': released})
+    bump_catalog_version()
     db.session.commit()
     log_game_action(
         'QUESTION_DELETED',
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from flask import current_app, render_template, request
+from flask_login import login_required
+
+import slow_log as slow_log_file
+from routes.admin import admin_bp
+from routes.admin._helpers import admin_required
+
+
+@admin_bp.route('/slow-log')
+@login_required
+@admin_required
+def slow_log():
+    kind = request.args.get('kind')
+    entries = slow_log_file.read_entries(current_app.config['SLOW_LOG_PATH'])
+    if kind in ('query', 'request'):
+        entries = [entry for entry in entries if entry.get('kind') == kind]
+    for entry in entries:
+        entry['time'] = datetime.fromtimestamp(entry.get('ts', 0))
+    offenders = slow_log_file.summarize(entries)[:20]
+    for group in offenders:
+        group['last_seen'] = datetime.fromtimestamp(group['last_ts'])
+    return render_template(
+        'admin/slow_log.html',
+        entries=entries[:200],
+        offenders=offenders,
+        kind=kind,
+        request_ms=current_app.config['SLOW_REQUEST_MS'],
+        query_ms=current_app.config['SLOW_QUERY_MS'],
+    )
@@ -0,0 +1,78 @@
+"""Resumable, chunked uploads for large question media.
+
+The question form uploads big files here in pieces before it is submitted,
+then posts only the session id (``<field>_upload``). Each chunk is a separate
+request well under ``MAX_CONTENT_LENGTH`` and is streamed straight to storage; a
+dropped connection costs at most one chunk.
+
+    POST /admin/uploads                      {"filename", "size"} → {"id", "chunk_size", "received"}
+    GET  /admin/uploads/<id>                 → {"size", "received", "complete", "chunk_size"}
+    PUT  /admin/uploads/<id>?offset=<n>      raw bytes → {"received"}; 409 if n ≠ received
+    POST /admin/uploads/<id>/complete        → {"complete": true}
+"""
+from flask import current_app, jsonify, request
+from flask_login import login_required
+
+from media import finish_upload, start_upload, upload_status, write_chunk
+from routes.admin import admin_bp
+from routes.admin._helpers import admin_required, _safe_int
+
+
+@admin_bp.route('/uploads', methods=['POST'])
+@login_required
+@admin_required
+def create_upload():
+    data = request.get_json(silent=True) or {}
+    size = _safe_int(data.get('size'), default=-1, minimum=-1)
+    if size < 0 or not data.get('filename'):
+        return jsonify({'success': False, 'message': 'A filename and size are required.'}), 400
+    if size > current_app.config['MAX_UPLOAD_SIZE']:
+        return jsonify({'success': False, 'message': 'File is too large.'}), 413
+
+    upload_id = start_upload(data['filename'], size)
+    return jsonify({
+        'success': True,
+        'id': upload_id,
+        'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE'],
+        'received': 0,
+    }), 201
+
+
+@admin_bp.route('/uploads/<upload_id>', methods=['GET'])
+@login_required
+@admin_required
+def upload_progress(upload_id):
+    status = upload_status(upload_id)
+    if status is None:
+        return jsonify({'success': False, 'message': 'Unknown upload.'}), 404
+    return jsonify({'success': True, 'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE'], **status})
+
+
+@admin_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@login_required
+@admin_required
+def upload_chunk(upload_id):
+    status = upload_status(upload_id)
+    if status is None:
+        return jsonify({'success': False, 'message': 'Unknown upload.'}), 404
+    offset = _safe_int(request.args.get('offset'), default=-1, minimum=-1)
+    if status['complete'] or offset != status['received']:
+        # Out of step (e.g. a retried chunk already landed): tell the client where to resume.
+        return jsonify({'success': False, **status}), 409
+
+    received = write_chunk(upload_id, request.stream, offset)
+    return jsonify({'success': True, 'received': received})
+
+
+@admin_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+@login_required
+@admin_required
+def complete_upload(upload_id):
+    status = upload_status(upload_id)
+    if status is None:
+        return jsonify({'success': False, 'message': 'Unknown upload.'}), 404
+    if status['received'] < status['size']:
+        return jsonify({'success': False, 'message': 'Upload is incomplete.', **status}), 409
+
+    finish_upload(upload_id)
+    return jsonify({'success': True, 'complete': True})
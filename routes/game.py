@@ -1,113 +1,144 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from models import User, Team, GameConfig, Level, Question, Clue, TeamProgress, ClueUsage
 from app import db
+from catalog import get_catalog
+from media import srcsets, video_sources
+from routes.media import prefetch_hints
+from metrics import record_game_action
+from tracing import span
+from rich_text import rich_html
 from datetime import datetime
 import sqlalchemy as sa
 
 game_bp = Blueprint('game', __name__)
+game_bp.add_app_template_filter(srcsets)
+game_bp.add_app_template_filter(video_sources)
 
 
 def log_game_action(action, team_id=None, details=None):
     from models import GameLog
-    log = GameLog(
-        team_id=team_id,
-        user_id=current_user.id if current_user.is_authenticated else None,
-        action=action,
-        details=details,
-    )
-    db.session.add(log)
-    db.session.commit()
+    with span('log.write', action=action):
+        log = GameLog(
+            team_id=team_id,
+            user_id=current_user.id if current_user.is_authenticated else None,
+            action=action,
+            details=details,
+        )
+        db.session.add(log)
+        db.session.commit()
+    record_game_action(action)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Dashboard
 # ─────────────────────────────────────────────────────────────────────────────
 
-@game_bp.route('/dashboard')
-@login_required
-def dashboard():
-    if current_user.is_admin:
-        return redirect(url_for('admin.dashboard'))
+# Screen template for each play state, plus the panel partial that
+# submit_answer can render inline (None → the client does a full reload).
+GAME_SCREENS = {
+    'waiting':        ('game/waiting.html', None, 'Waiting for Game - Treasure Hunt'),
+    'level_locked':   ('game/level_locked.html', 'game/_level_locked_panel.html', 'Level Locked - Treasure Hunt'),
+    'level_complete': ('game/level_complete.html', 'game/_level_complete_panel.html', 'Level Complete - Treasure Hunt'),
+    'play':           ('game/play.html', 'game/_play_panel.html', 'Play Game - Treasure Hunt'),
+}
 
-    if not current_user.team:
-        flash('You are not assigned to any team. Please contact admin.', 'warning')
-        return render_template('game/no_team.html')
 
-    config = GameConfig.query.first()
-    team = current_user.team
+def _play_view(team, config):
+    """Work out which screen `team` should see and build its template context.
 
+    Returns ``(state, context, error)`` where `state` is a key of GAME_SCREENS
+    and `error` is a message for the player (or None). Shared by the dashboard
+    and the inline next-screen payload of submit_answer, so both always agree.
+    """
     if not config or not config.game_started:
-        return render_template('game/waiting.html')
+        return 'waiting', {}, None
 
-    current_level = Level.query.filter_by(level_number=team.current_level).first()
+    with span('level.fetch'):
+        current_level = Level.query.filter_by(level_number=team.current_level).first()
 
     # Issue #9 fix: level not found → clear error, no redirect loop back to join_team
     if not current_level:
-        flash('Your assigned level no longer exists. Please contact admin.', 'danger')
-        return render_template('game/waiting.html')
+        return 'waiting', {}, 'Your assigned level no longer exists. Please contact admin.'
 
     # Fix #2: check is_active FIRST.
     # A team on a locked level should always see the locked screen,
     # regardless of how far through the questions they are.
     if not current_level.is_active:
-        return render_template('game/level_locked.html', team=team, current_level=team.current_level)
+        return 'level_locked', dict(team=team, current_level=team.current_level), None
 
-    # Get total questions in this level (single query, reused below)
-    total_questions = Question.query.filter_by(level_id=current_level.id).count()
+    # Questions, clues and media come from the worker's catalog snapshot while
+    # a game is running; `catalog` is None otherwise and we query directly.
+    with span('catalog.lookup'):
+        catalog = get_catalog(config)
+
+        # Get total questions in this level (single lookup, reused below)
+        if catalog:
+            total_questions = catalog.level_size(current_level.level_number)
+        else:
+            total_questions = Question.query.filter_by(level_id=current_level.id).count()
 
     # Check if team has completed all questions in this level
     if team.current_question > total_questions:
         # Fix #7: compute qualified explicitly here — don't leave it to template inference
         qualified = team.current_level > current_level.level_number
-        last_question = Question.query.filter_by(
-            level_id=current_level.id,
-            question_number=total_questions,
-        ).first()
-        return render_template(
-            'game/level_complete.html',
+        if catalog:
+            last_question = catalog.question(current_level.level_number, total_questions)
+        else:
+            last_question = Question.query.filter_by(
+                level_id=current_level.id,
+                question_number=total_questions,
+            ).first()
+        return 'level_complete', dict(
             team=team,
             level=current_level,
             qualified=qualified,
             last_question=last_question,
-        )
+        ), None
 
     # Get current question
-    current_question = Question.query.filter_by(
-        level_id=current_level.id,
-        question_number=team.current_question,
-    ).first()
+    with span('question.fetch'):
+        if catalog:
+            current_question = catalog.question(current_level.level_number, team.current_question)
+        else:
+            current_question = Question.query.filter_by(
+                level_id=current_level.id,
+                question_number=team.current_question,
+            ).first()
 
     # Fallback for new teams or out-of-sync question pointer
     if not current_question and team.current_question in (0, 1):
-        current_question = (
-            Question.query
-            .filter_by(level_id=current_level.id)
-            .order_by(Question.question_number)
-            .first()
-        )
+        if catalog:
+            current_question = catalog.first_in_level(current_level.level_number)
+        else:
+            current_question = (
+                Question.query
+                .filter_by(level_id=current_level.id)
+                .order_by(Question.question_number)
+                .first()
+            )
         if current_question:
             team.current_question = current_question.question_number
             db.session.commit()
 
     if not current_question:
-        flash('Question not found. Contact admin.', 'danger')
-        return render_template('game/waiting.html')
+        return 'waiting', {}, 'Question not found. Contact admin.'
 
     # Get/create progress entry
-    progress = TeamProgress.query.filter_by(
-        team_id=team.id,
-        question_id=current_question.id,
-    ).first()
-
-    if not progress:
-        progress = TeamProgress(
+    with span('progress.upsert'):
+        progress = TeamProgress.query.filter_by(
             team_id=team.id,
             question_id=current_question.id,
-            level_number=current_level.level_number,
-        )
-        db.session.add(progress)
-        db.session.commit()
+        ).first()
+
+        if not progress:
+            progress = TeamProgress(
+                team_id=team.id,
+                question_id=current_question.id,
+                level_number=current_level.level_number,
+            )
+            db.session.add(progress)
+            db.session.commit()
 
     # Clues already used for this question
     used_clues = ClueUsage.query.filter_by(
@@ -120,8 +151,19 @@ def dashboard():
     # the property won't be re-invoked inside the template if we pass the value.
     clues_remaining = team.clues_remaining
 
-    return render_template(
-        'game/play.html',
+    # Media of the next question in this level, warmed while the team works.
+    next_question = None
+    if current_app.config['PREFETCH_NEXT_MEDIA']:
+        next_number = current_question.question_number + 1
+        if catalog:
+            next_question = catalog.question(current_level.level_number, next_number)
+        else:
+            next_question = Question.query.filter_by(
+                level_id=current_level.id,
+                question_number=next_number,
+            ).first()
+
+    return 'play', dict(
         team=team,
         level=current_level,
         question=current_question,
@@ -129,7 +171,27 @@ def dashboard():
         used_clue_ids=used_clue_ids,
         clues_remaining=clues_remaining,
         config=config,
-    )
+        prefetch=prefetch_hints(next_question),
+    ), None
+
+
+@game_bp.route('/dashboard')
+@login_required
+def dashboard():
+    if current_user.is_admin:
+        return redirect(url_for('admin.dashboard'))
+
+    if not current_user.team:
+        flash('You are not assigned to any team. Please contact admin.', 'warning')
+        return render_template('game/no_team.html')
+
+    with span('config.lookup'):
+        config = GameConfig.query.first()
+    state, context, error = _play_view(current_user.team, config)
+    if error:
+        flash(error, 'danger')
+    with span('template.render', template=GAME_SCREENS[state][0]):
+        return render_template(GAME_SCREENS[state][0], **context)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -156,11 +218,16 @@ def submit_answer():
     if not answer:
         return jsonify({'success': False, 'message': 'Answer cannot be empty.'})
 
-    question = Question.query.get_or_404(question_id)
-    config   = GameConfig.query.first()
+    with span('config.lookup'):
+        config = GameConfig.query.first()
+    with span('question.fetch'):
+        catalog  = get_catalog(config)
+        question = catalog.get(question_id) if catalog else None
+        if not question:
+            question = Question.query.get_or_404(question_id)
 
-    # Issue #3 fix: verify this question belongs to the team's current position
-    current_level = Level.query.filter_by(level_number=team.current_level).first()
+        # Issue #3 fix: verify this question belongs to the team's current position
+        current_level = Level.query.filter_by(level_number=team.current_level).first()
     if (not current_level
             or question.level_id != current_level.id
             or question.question_number != team.current_question):
@@ -176,10 +243,11 @@ def submit_answer():
         return jsonify({'success': False, 'message': 'Incorrect answer. Try again!'})
 
     # ── Correct answer path ──────────────────────────────────────────────────
-    progress = TeamProgress.query.filter_by(
-        team_id=team.id,
-        question_id=question_id,
-    ).first()
+    with span('progress.fetch'):
+        progress = TeamProgress.query.filter_by(
+            team_id=team.id,
+            question_id=question_id,
+        ).first()
 
     if not progress or progress.is_completed:
         return jsonify({'success': False, 'message': 'Question already completed.'})
@@ -192,7 +260,10 @@ def submit_answer():
     # Move pointer to next question
     team.current_question += 1
 
-    total_questions_in_level = Question.query.filter_by(level_id=question.level_id).count()
+    if catalog:
+        total_questions_in_level = catalog.level_size(current_level.level_number)
+    else:
+        total_questions_in_level = Question.query.filter_by(level_id=question.level_id).count()
 
     if team.current_question > total_questions_in_level:
         # Team finished all questions in this level
@@ -262,7 +333,8 @@ def submit_answer():
                 )
 
     # Issue #5 fix: single commit at the end — no intermediate partial commits
-    db.session.commit()
+    with span('progress.commit'):
+        db.session.commit()
 
     log_game_action(
         'SUBMIT_CORRECT_ANSWER',
@@ -277,7 +349,27 @@ def submit_answer():
         'has_explanation': bool(question.explanation),
     }
     if question.explanation:
-        response_data['explanation'] = question.explanation
+        response_data['explanation'] = rich_html(question.explanation_html, question.explanation)
+
+    # Optional inline payload: the next screen's panel, so play.html can swap
+    # it in place instead of navigating back through the dashboard.
+    if request.form.get('inline'):
+        with span('next.view'):
+            state, context, error = _play_view(team, config)
+        _, panel_template, title = GAME_SCREENS[state]
+        if panel_template and not error:
+            next_question = context.get('question')
+            with span('template.render', template=panel_template):
+                html = render_template(panel_template, **context)
+            response_data['next'] = {
+                'state': state,
+                'title': title,
+                'html': html,
+                'level_number': team.current_level,
+                'question_number': team.current_question,
+                'question_id': next_question.id if next_question else None,
+                'clues_remaining': context.get('clues_remaining'),
+            }
 
     return jsonify(response_data)
 
@@ -293,8 +385,15 @@ def get_clue(question_id):
         return jsonify({'success': False, 'message': 'You are not assigned to any team.'})
 
     team     = current_user.team
-    question = Question.query.get_or_404(question_id)
-    level    = question.level
+    catalog  = get_catalog(GameConfig.query.first())
+    question = catalog.get(question_id) if catalog else None
+    if question:
+        clues = question.clues  # catalog records are pre-sorted by clue_order
+        level_number = question.level_number
+    else:
+        question = Question.query.get_or_404(question_id)
+        clues = Clue.query.filter_by(question_id=question_id).order_by(Clue.clue_order).all()
+        level_number = question.level.level_number
 
     # Issue #7 fix: compute clues_remaining once at the top
     clues_remaining = team.clues_remaining
@@ -303,7 +402,6 @@ def get_clue(question_id):
         return jsonify({'success': False, 'message': 'You have used all available clues for the entire game.'})
 
     # Issue #6 fix: guard "no clues defined" BEFORE the loop
-    clues = Clue.query.filter_by(question_id=question_id).order_by(Clue.clue_order).all()
     if not clues:
         return jsonify({'success': False, 'message': 'There are no clues defined for this question.'})
 
@@ -334,7 +432,7 @@ def get_clue(question_id):
         team_id=team.id,
         details=(
             f"Clue {next_clue.clue_order} used for Question {question.question_number} "
-            f"in Level {level.level_number}. (Remaining: {new_remaining})"
+            f"in Level {level_number}. (Remaining: {new_remaining})"
         ),
     )
 
@@ -0,0 +1,158 @@
+"""Question media delivery with signed URLs, Range support and nginx offload.
+
+Uploads are served through this blueprint instead of the generic static
+handler. URLs are minted by :func:`media_src` while the play page renders the
+team's current question and carry an expiry plus an HMAC of the path, so a
+player can only fetch media they have already been shown, and checking a
+request costs one hash — no session or database lookup. Because the URL itself
+is the credential, responses may be cached publicly (by nginx ``proxy_cache``
+or the browser) until the link expires without exposing unreleased questions.
+
+The expiry and signature sit in the path (``/media/<expires>/<sig>/uploads/…``)
+rather than the query string so relative references keep them: an HLS
+playlist's segment URIs resolve under the same prefix. For a transcoded
+video the signature therefore covers its whole ``-hls/`` directory.
+
+Once the signature checks out, a sync gunicorn worker only has to hand over
+the file:
+
+* With ``MEDIA_ACCEL_REDIRECT`` set (e.g. ``/_protected_media/``) the
+  response is an empty body carrying ``X-Accel-Redirect`` and nginx streams
+  the file from an ``internal`` location — including Range and conditional
+  requests — while the worker moves on.
+* Otherwise the file is sent with ``send_from_directory``, which answers
+  ``Range``/``If-Range`` with 206 partial content and ``If-None-Match``/
+  ``If-Modified-Since`` with 304, and honours Flask's ``USE_X_SENDFILE`` for
+  Apache/lighttpd.
+
+With ``MEDIA_STORAGE=s3`` (storage.py) the bytes are not on this machine: the
+response is a redirect to a presigned bucket URL that expires with the link.
+HLS playlists are the exception — they are small and are returned from here
+so the segment URIs inside them keep resolving under ``/media/``.
+"""
+import hashlib
+import hmac
+import mimetypes
+import posixpath
+import time
+
+from flask import Blueprint, abort, current_app, redirect, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+from media import is_immutable, srcsets, video_sources
+from storage import get_storage
+
+media_bp = Blueprint('media', __name__)
+
+# HLS output from video.py; the system mime.types often lacks or misnames these.
+mimetypes.add_type('application/vnd.apple.mpegurl', '.m3u8')
+mimetypes.add_type('video/mp2t', '.ts')
+
+ONE_YEAR = 365 * 24 * 3600
+
+
+def _scope(media_url):
+    """The part of a path a signature covers: the file, or its whole HLS directory."""
+    head, sep, _ = media_url.partition('-hls/')
+    return head + sep if sep else media_url
+
+
+def _signature(media_url, expires):
+    key = current_app.config['SECRET_KEY'].encode('utf-8')
+    message = f'media:{_scope(media_url)}:{expires}'.encode('utf-8')
+    return hmac.new(key, message, hashlib.sha256).hexdigest()[:32]
+
+
+def _expiry(now=None):
+    """Expiry rounded up to the TTL window, so re-renders reuse the same URL.
+
+    A link stays valid for between one and two windows after it is issued;
+    within a window every page view produces an identical, cacheable URL.
+    """
+    ttl = current_app.config['MEDIA_URL_TTL']
+    now = int(time.time() if now is None else now)
+    return (now // ttl + 2) * ttl
+
+
+@media_bp.app_template_global()
+def media_src(media_url):
+    """Signed, expiring URL a player's browser should use for an uploaded file.
+
+    Only call this for media the current user is allowed to see (the play
+    templates render nothing but the team's current question). The one
+    exception is :func:`prefetch_hints`, which signs the next question's
+    media when an admin has turned ``PREFETCH_NEXT_MEDIA`` on.
+    """
+    expires = _expiry()
+    return url_for('media.serve', expires=expires, signature=_signature(media_url, expires), filename=media_url)
+
+
+def prefetch_hints(question):
+    """Signed media of `question` for the play page to warm ahead of time.
+
+    This hands the team the next question's media before they have solved
+    the current one, so callers only use it with ``PREFETCH_NEXT_MEDIA`` on.
+
+    Images carry their srcsets so the browser picks the same candidate the
+    ``<picture>`` will; videos contribute their poster and HLS playlist
+    (whole original files are too large to fetch speculatively).
+    """
+    if question is None:
+        return []
+    items = [(m.media_type, m.media_url, m.variants) for m in question.media_files]
+    if question.media_url:
+        items.insert(0, (question.question_type, question.media_url, question.media_variants))
+
+    hints = []
+    for kind, url, variants in items:
+        if kind == 'image':
+            hints.append({'kind': 'image', 'src': media_src(url), 'srcsets': srcsets(variants)})
+        elif kind == 'video':
+            stream = video_sources(variants)
+            hints += [{'kind': 'fetch', 'src': media_src(stream[name])} for name in ('poster', 'hls') if name in stream]
+    return hints
+
+
+def verify_signature(media_url, expires, signature):
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_signature(media_url, expires), signature)
+
+
+@media_bp.route('/<int:expires>/<signature>/<path:filename>')
+def serve(expires, signature, filename):
+    # A signature over an HLS directory must not reach outside it through
+    # `..` (the URL decoder has already turned %2e%2e into dots).
+    if (not filename.startswith('uploads/')
+            or posixpath.normpath(filename) != filename
+            or not filename.startswith(_scope(filename))
+            or safe_join(current_app.static_folder, filename) is None):
+        abort(404)
+    if not verify_signature(filename, expires, signature):
+        abort(403)
+
+    storage = get_storage()
+    accel_prefix = current_app.config.get('MEDIA_ACCEL_REDIRECT')
+    if not storage.is_local:
+        if filename.endswith('.m3u8'):
+            playlist = storage.get_bytes(filename)
+            if playlist is None:
+                abort(404)
+            response = current_app.response_class(playlist, mimetype=mimetypes.guess_type(filename)[0])
+        else:
+            response = redirect(storage.presigned_url(filename, expires))
+    elif accel_prefix:
+        response = current_app.response_class()
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + filename
+        response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    else:
+        response = send_from_directory(storage.root, filename, conditional=True)
+
+    # The signed URL is the credential, so shared caches may keep the response
+    # until the link expires. Content-addressed bytes never change before then.
+    response.cache_control.public = True
+    response.cache_control.max_age = max(0, min(ONE_YEAR, expires - int(time.time())))
+    response.cache_control.no_cache = None
+    if is_immutable(filename):
+        response.cache_control.immutable = True
+    return response
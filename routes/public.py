@@ -1,18 +1,61 @@
-from flask import Blueprint, render_template, abort
+from flask import Blueprint, current_app, render_template, abort, request
+from werkzeug.exceptions import MethodNotAllowed
+from app import db
 from models import SiteContent, Page
+from page_cache import cached_page, normalize_url, page_routes
+from rich_text import rich_html
 
 
 public_bp = Blueprint('public', __name__)
+public_bp.add_app_template_global(rich_html)
 
 
 @public_bp.route('/')
+@cached_page
 def home():
     content = SiteContent.query.first()
     return render_template('public/home.html', content=content)
 
 
+def _render_page(page_db_id):
+    page = db.session.get(Page, page_db_id) if page_db_id is not None else None
+    if page is None or not page.is_published:
+        abort(404)
+    return render_template('public/page.html', page=page)
+
+
 @public_bp.route('/p/<string:page_url_slug>')
+@cached_page
 def view_page(page_url_slug):
     """Serve a custom admin-created page by its slug (page_id)."""
-    page = Page.query.filter_by(page_id=page_url_slug, is_published=True).first_or_404()
-    return render_template('public/page.html', page=page)
+    return _render_page(page_routes().by_slug.get(page_url_slug))
+
+
+@cached_page
+def _page_at(url):
+    return _render_page(page_routes().by_url.get(url))
+
+
+@public_bp.route('/<path:page_path>', methods=['GET', 'HEAD'])
+def page_at_url(page_path):
+    """Serve a custom page at its configured URL (e.g. /about).
+
+    Any path no other route claims ends up here. Unless its first segment
+    starts some published page's URL it 404s at once, so bot scans never
+    reach the page cache; the rest are looked up in the in-memory route
+    table.
+    """
+    url = normalize_url(page_path)
+    routes = page_routes()
+    if url.split('/', 2)[1] not in routes.prefixes:
+        abort(404)
+    return _page_at(url)
+
+
+@public_bp.route('/<path:page_path>', methods=['POST', 'PUT', 'PATCH', 'DELETE'])
+def page_at_url_other_methods(page_path):
+    """404 (not 405) for other methods on a path only the catch-all matches."""
+    rule, _ = current_app.url_map.bind_to_environ(request.environ).match(method='GET', return_rule=True)
+    if rule.endpoint != 'public.page_at_url':  # a real route that does not take this method
+        raise MethodNotAllowed(valid_methods=sorted(rule.methods))
+    abort(404)
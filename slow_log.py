@@ -0,0 +1,213 @@
+"""Log of slow requests and slow SQL statements, with where they came from.
+
+Requests slower than ``SLOW_REQUEST_MS`` and statements slower than
+``SLOW_QUERY_MS`` are appended as JSON lines to ``SLOW_LOG_PATH`` (default
+``logs/slow.log``, rotated at 5 MB with three old files kept). Each entry
+records the route, the user's role and the timing. Statements also carry the
+SQL text with literals replaced by ``?`` (bound parameters are never logged)
+and the line in ``routes/`` that issued them, so a stalled ``level_teams`` or
+``initialize_game`` points straight at the code. **Admin → Reports &
+Analytics → Slow Log** lists recent entries and the worst offenders.
+
+All gunicorn workers append to the same file; rotation takes a file lock so
+two workers never rotate at once.
+"""
+import fcntl
+import json
+import logging
+import os
+import re
+import time
+import traceback
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import NoInspectionAvailable
+
+logger = logging.getLogger('treasure_hunt.slow')
+
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+ROUTES_DIR = os.path.join(APP_ROOT, 'routes') + os.sep
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that several worker processes can append to."""
+
+    def emit(self, record):
+        with open(self.baseFilename + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if self.stream is not None and not self._is_current():
+                    self.stream.close()  # another worker rotated the file
+                    self.stream = None
+                super().emit(record)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _is_current(self):
+        try:
+            return os.fstat(self.stream.fileno()).st_ino == os.stat(self.baseFilename).st_ino
+        except OSError:
+            return False
+
+
+def redact(statement):
+    """SQL text with string and number literals replaced by ``?``."""
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+def call_site():
+    """``routes/game.py:216 in submit_answer`` — the innermost frame under routes/.
+
+    Falls back to the innermost frame in the application (jobs, CLI).
+    """
+    fallback = None
+    for frame in reversed(traceback.extract_stack()):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(ROUTES_DIR):
+            return f'{os.path.relpath(path, APP_ROOT)}:{frame.lineno} in {frame.name}'
+        if (fallback is None and path.startswith(APP_ROOT + os.sep)
+                and 'site-packages' not in path and path != os.path.abspath(__file__)
+                and not path.endswith('instrumentation.py')):
+            fallback = f'{os.path.relpath(path, APP_ROOT)}:{frame.lineno} in {frame.name}'
+    return fallback
+
+
+def _role(user):
+    if not user.is_authenticated:
+        return 'anonymous'
+    return 'admin' if user.is_admin else 'player'
+
+
+def _loaded_role():
+    """The role from attributes already in memory, without emitting SQL."""
+    user = g.get('_login_user')
+    if user is None:
+        return None
+    try:
+        loaded = sa_inspect(user).dict
+    except NoInspectionAvailable:  # AnonymousUserMixin
+        return 'anonymous'
+    if 'is_admin' not in loaded:
+        return None
+    return 'admin' if loaded['is_admin'] else 'player'
+
+
+def _context(in_cursor_event=False):
+    if not has_request_context():
+        return {'route': 'cli/job', 'role': None}
+    # Inside a cursor event, touching current_user (or an expired attribute
+    # on it) would run another statement from within this one.
+    role = _loaded_role()
+    if role is None and not in_cursor_event:
+        role = _role(current_user)
+    return {'route': request.endpoint, 'method': request.method, 'role': role}
+
+
+def _write(entry):
+    logger.warning(json.dumps(entry, default=str))
+
+
+def query(statement, duration):
+    """Called by instrumentation.py for every statement; logs the slow ones."""
+    if not has_app_context() or not logger.handlers:
+        return
+    threshold = current_app.config['SLOW_QUERY_MS']
+    if not threshold or duration * 1000 < threshold:
+        return
+    _write({
+        'ts': time.time(),
+        'kind': 'query',
+        'ms': round(duration * 1000, 1),
+        'sql': redact(statement)[:2000],
+        'site': call_site(),
+        **_context(in_cursor_event=True),
+    })
+
+
+def request_finished(response, duration, stats):
+    threshold = current_app.config['SLOW_REQUEST_MS']
+    if not logger.handlers or not threshold or duration * 1000 < threshold:
+        return
+    _write({
+        'ts': time.time(),
+        'kind': 'request',
+        'ms': round(duration * 1000, 1),
+        'path': request.path,
+        'status': response.status_code,
+        'db_statements': stats.count if stats else None,
+        'db_ms': round(stats.total * 1000, 1) if stats else None,
+        **_context(),
+    })
+
+
+def read_entries(path, limit=500):
+    """The newest `limit` entries, newest first, from the log and its last rotation."""
+    entries = deque(maxlen=limit)
+    for name in (path + '.1', path):
+        try:
+            with open(name) as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+    return list(reversed(entries))
+
+
+def summarize(entries):
+    """Group entries by statement and call site (queries) or route (requests), worst first."""
+    groups = {}
+    for entry in entries:
+        if entry.get('kind') == 'query':
+            key = ('query', entry.get('site'), entry.get('sql'))
+        else:
+            key = ('request', entry.get('route') or entry.get('path'), None)
+        group = groups.setdefault(key, {
+            'kind': key[0], 'where': key[1], 'sql': key[2], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'last_ts': 0,
+        })
+        group['count'] += 1
+        group['total_ms'] += entry.get('ms', 0)
+        group['max_ms'] = max(group['max_ms'], entry.get('ms', 0))
+        group['last_ts'] = max(group['last_ts'], entry.get('ts', 0))
+    return sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)
+
+
+def init_app(app):
+    app.config.setdefault('SLOW_REQUEST_MS', 500)
+    app.config.setdefault('SLOW_QUERY_MS', 100)
+    path = app.config.get('SLOW_LOG_PATH') or os.path.join(app.root_path, 'logs', 'slow.log')
+    app.config['SLOW_LOG_PATH'] = path
+
+    if not logger.handlers:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = SharedRotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
+
+    @app.before_request
+    def start_slow_timer():
+        g.slow_started = time.perf_counter()
+
+    @app.after_request
+    def log_slow_request(response):
+        started = g.pop('slow_started', None)
+        if started is not None:
+            request_finished(response, time.perf_counter() - started, g.get('query_stats'))
+        return response
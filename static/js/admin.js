@@ -375,3 +375,68 @@ $(document).on('keydown', function (e) {
         $('#sidebar').removeClass('show');
     }
 });
+
+// ──────────────────────────────────────────────────────────
+// Resumable chunked uploads (routes/admin/uploads.py).
+// Resolves with the upload session id once the server has the whole file;
+// onProgress(sent, total) is called after every chunk. A session id is kept
+// in localStorage so re-submitting after a dropped connection resumes it.
+// ──────────────────────────────────────────────────────────
+async function chunkedUpload(file, onProgress) {
+    const resumeKey = 'upload:' + [file.name, file.size, file.lastModified].join(':');
+    const MAX_RETRIES = 5;
+    let session = null;
+
+    const savedId = localStorage.getItem(resumeKey);
+    if (savedId) {
+        const resp = await fetch(`/admin/uploads/${savedId}`);
+        if (resp.ok) session = Object.assign({ id: savedId }, await resp.json());
+    }
+    if (!session) {
+        const resp = await fetch('/admin/uploads', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        });
+        session = await resp.json();
+        if (!resp.ok) throw new Error(session.message || 'Could not start upload');
+        localStorage.setItem(resumeKey, session.id);
+    }
+
+    const url = `/admin/uploads/${session.id}`;
+    let received = session.received;
+    let failures = 0;
+    onProgress(received, file.size);
+
+    while (!session.complete && received < file.size) {
+        const end = Math.min(received + session.chunk_size, file.size);
+        try {
+            const resp = await fetch(`${url}?offset=${received}`, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: file.slice(received, end)
+            });
+            if (resp.status >= 500) throw new Error(`Server error ${resp.status}`);
+            const data = await resp.json();
+            if (!resp.ok && resp.status !== 409) {
+                const fatal = new Error(data.message || 'Upload failed');
+                fatal.fatal = true;
+                throw fatal;
+            }
+            received = data.received;  // on 409 this is where the server wants us to resume
+            failures = 0;
+        } catch (err) {
+            if (err.fatal || ++failures > MAX_RETRIES) throw err;
+            await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+            const resp = await fetch(url).catch(() => null);
+            if (resp && resp.ok) received = (await resp.json()).received;
+        }
+        onProgress(received, file.size);
+    }
+
+    const resp = await fetch(`${url}/complete`, { method: 'POST' });
+    const data = await resp.json();
+    if (!resp.ok) throw new Error(data.message || 'Could not finish upload');
+    localStorage.removeItem(resumeKey);
+    return session.id;
+}
@@ -27,3 +27,109 @@ $(document).ready(function () {
         }, 0);
     });
 });
+
+// Cache static assets and prefetched question media (see static/js/sw.js).
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', function () {
+        navigator.serviceWorker.register('/sw.js').catch(function () {});
+    });
+}
+
+// Wire up behaviour for a game screen panel. Called on full page loads and
+// again by play.html after it swaps in the next screen from submit-answer.
+// hls.js is only fetched the first time a page has a transcoded video.
+let hlsJsLoading = null;
+function loadHlsJs(src) {
+    if (!hlsJsLoading) {
+        hlsJsLoading = new Promise(function (resolve) {
+            const script = document.createElement('script');
+            script.src = src;
+            script.onload = script.onerror = resolve;  // on error we keep the MP4 fallback
+            document.head.appendChild(script);
+        });
+    }
+    return hlsJsLoading;
+}
+
+// Warm the next question's media once the current one has loaded. Images are
+// built as detached <picture> elements so the browser picks exactly the
+// candidate it will later render; the service worker (sw.js) keeps the bytes.
+function prefetchMedia(hints) {
+    const run = window.requestIdleCallback || function (fn) { setTimeout(fn, 2000); };
+    run(function () {
+        hints.forEach(function (hint) {
+            if (hint.kind !== 'image') {
+                fetch(hint.src, { credentials: 'same-origin' }).catch(function () {});
+                return;
+            }
+            const picture = document.createElement('picture');
+            const sizes = '(min-width: 768px) 66vw, 100vw';
+            ['avif', 'webp'].forEach(function (format) {
+                if (!hint.srcsets[format]) return;
+                const source = document.createElement('source');
+                source.type = 'image/' + format;
+                source.srcset = hint.srcsets[format];
+                source.sizes = sizes;
+                picture.appendChild(source);
+            });
+            const img = document.createElement('img');
+            if (hint.srcsets.original) {
+                img.srcset = hint.srcsets.original;
+                img.sizes = sizes;
+            }
+            img.src = hint.src;
+            picture.appendChild(img);
+        });
+    });
+}
+
+function initGamePanel(root) {
+    root = root || document;
+
+    const hints = root.querySelector('#prefetch-hints');
+    if (hints) {
+        prefetchMedia(JSON.parse(hints.textContent));
+    }
+
+    // Transcoded videos: stream the adaptive HLS renditions, natively
+    // (Safari/iOS) or through hls.js. Nothing is fetched until play.
+    root.querySelectorAll('video[data-hls]').forEach(function (video) {
+        if (video.canPlayType('application/vnd.apple.mpegurl')) {
+            video.src = video.dataset.hls;
+            return;
+        }
+        loadHlsJs(video.dataset.hlsPlayer).then(function () {
+            if (!window.Hls || !Hls.isSupported()) return;
+            const hls = new Hls({ autoStartLoad: false, capLevelToPlayerSize: true });
+            hls.loadSource(video.dataset.hls);
+            hls.attachMedia(video);
+            video.addEventListener('play', function () { hls.startLoad(); }, { once: true });
+        });
+    });
+
+    // Level-locked screen: auto-refresh countdown
+    const countdown = root.querySelector('#countdown');
+    if (countdown) {
+        let secs = parseInt(countdown.textContent, 10) || 30;
+        const timer = setInterval(function () {
+            secs--;
+            countdown.textContent = secs;
+            if (secs <= 0) {
+                clearInterval(timer);
+                location.reload();
+            }
+        }, 1000);
+    }
+
+    // Level-complete screen: flip the chevron on the last-question review
+    const review = root.querySelector('#lastQuestionReview');
+    if (review) {
+        const header = review.previousElementSibling;
+        review.addEventListener('show.bs.collapse', function () {
+            header.querySelector('.bi-chevron-down').classList.replace('bi-chevron-down', 'bi-chevron-up');
+        });
+        review.addEventListener('hide.bs.collapse', function () {
+            header.querySelector('.bi-chevron-up').classList.replace('bi-chevron-up', 'bi-chevron-down');
+        });
+    }
+}
@@ -0,0 +1,86 @@
+// Treasure Hunt service worker.
+//
+// * Fingerprinted assets (/static/dist/) never change under the same URL:
+//   served cache-first.
+// * Other static files: served from cache, refreshed in the background.
+// * Question media (/media/<expires>/<signature>/uploads/...): cached under
+//   the path without the signature, so media prefetched for the next question
+//   is found again when the page renders it with a freshly signed URL. Range
+//   requests (video seeking) always go to the network.
+// * Pages and API calls are never touched.
+
+const STATIC_CACHE = 'th-static-v1';
+const MEDIA_CACHE = 'th-media-v1';
+const MEDIA_LIMIT = 80;  // entries; oldest are evicted first
+const MEDIA_PATH = /^\/media\/\d+\/[0-9a-f]+\/(uploads\/.+)$/;
+
+self.addEventListener('install', function () {
+    self.skipWaiting();
+});
+
+self.addEventListener('activate', function (event) {
+    const keep = [STATIC_CACHE, MEDIA_CACHE];
+    event.waitUntil(
+        caches.keys()
+            .then(function (names) {
+                return Promise.all(names.filter(function (n) { return keep.indexOf(n) === -1; })
+                    .map(function (n) { return caches.delete(n); }));
+            })
+            .then(function () { return self.clients.claim(); })
+    );
+});
+
+function trim(cache, limit) {
+    cache.keys().then(function (keys) {
+        keys.slice(0, Math.max(0, keys.length - limit)).forEach(function (key) { cache.delete(key); });
+    });
+}
+
+function cacheFirst(request, cacheName, key, limit) {
+    return caches.open(cacheName).then(function (cache) {
+        return cache.match(key).then(function (hit) {
+            if (hit) return hit;
+            return fetch(request).then(function (response) {
+                if (response.status === 200) {
+                    cache.put(key, response.clone()).then(function () {
+                        if (limit) trim(cache, limit);
+                    });
+                }
+                return response;
+            });
+        });
+    });
+}
+
+function staleWhileRevalidate(request) {
+    return caches.open(STATIC_CACHE).then(function (cache) {
+        return cache.match(request).then(function (hit) {
+            const refresh = fetch(request).then(function (response) {
+                if (response.status === 200) cache.put(request, response.clone());
+                return response;
+            });
+            if (hit) {
+                refresh.catch(function () {});
+                return hit;
+            }
+            return refresh;
+        });
+    });
+}
+
+self.addEventListener('fetch', function (event) {
+    const request = event.request;
+    if (request.method !== 'GET' || request.headers.has('range')) return;
+
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    const media = url.pathname.match(MEDIA_PATH);
+    if (media) {
+        event.respondWith(cacheFirst(request, MEDIA_CACHE, '/media/' + media[1], MEDIA_LIMIT));
+    } else if (url.pathname.startsWith('/static/dist/')) {
+        event.respondWith(cacheFirst(request, STATIC_CACHE, request));
+    } else if (url.pathname.startsWith('/static/')) {
+        event.respondWith(staleWhileRevalidate(request));
+    }
+});
@@ -0,0 +1,262 @@
+"""Where uploaded media is kept: the local disk or an S3-compatible bucket.
+
+Everything in media.py, video.py's callers and the /media/ route reads and
+writes uploads through :func:`get_storage`, addressing files by their media
+URL (``uploads/cas/ab/….jpg``), so the backend can be swapped without
+touching stored rows.
+
+* ``local`` (default) — files under the app's ``static/`` folder, as before.
+  Only suitable for a single app server or a shared filesystem.
+* ``s3`` — any S3-compatible store (AWS S3, MinIO, Ceph, R2 …). App servers
+  keep nothing on disk except scratch files while processing, so several
+  nodes can sit behind a load balancer. Players are redirected to short-lived
+  presigned URLs and fetch the bytes from the bucket directly. Needs
+  ``boto3``.
+
+Both backends offer the same small interface; work that needs a real file
+(Pillow, ffmpeg) uses :meth:`local_copy` and writes results with :meth:`put`.
+"""
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # optional — only needed for MEDIA_STORAGE=s3
+    boto3 = None
+
+
+class LocalStorage:
+    is_local = True
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def scratch_dir(self):
+        """Directory for temp files, on the same filesystem so :meth:`put` is a rename."""
+        path = self.path('uploads/.tmp')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self.path(key))
+        except OSError:
+            return None
+
+    def modified(self, key):
+        try:
+            return os.path.getmtime(self.path(key))
+        except OSError:
+            return None
+
+    def touch(self, key):
+        """Mark a stored file as just written; False if it does not exist."""
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, local_path, key):
+        """Move `local_path` into the store under `key`."""
+        target = self.path(key)
+        if os.path.abspath(local_path) == os.path.abspath(target):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(local_path, target)
+
+    def put_bytes(self, data, key):
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = target + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+
+    def get_bytes(self, key):
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @contextmanager
+    def local_copy(self, key):
+        yield self.path(key)
+
+    def move(self, key, new_key):
+        target = self.path(new_key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(self.path(key), target)
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_prefix(self, prefix):
+        """Delete every file whose key starts with `prefix` (a ``…/`` directory)."""
+        shutil.rmtree(self.path(prefix.rstrip('/')), ignore_errors=True)
+
+    def list(self, prefix):
+        """Yield ``(key, size, mtime)`` for every file under `prefix`."""
+        def walk(directory, key_prefix):
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                return
+            for entry in entries:
+                key = key_prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    yield from walk(entry.path, key + '/')
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat()
+                    yield key, stat.st_size, stat.st_mtime
+        yield from walk(self.path(prefix.rstrip('/')), prefix.rstrip('/') + '/')
+
+    def presigned_url(self, key, expires):
+        return None  # served by the app (or nginx) from disk
+
+
+class S3Storage:
+    is_local = False
+
+    def __init__(self, bucket, prefix='', **client_options):
+        if boto3 is None:
+            raise RuntimeError('MEDIA_STORAGE=s3 needs the boto3 package (pip install boto3).')
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.client = boto3.client('s3', **{k: v for k, v in client_options.items() if v})
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def scratch_dir(self):
+        return None  # system temp directory
+
+    def exists(self, key):
+        return self.size(key) is not None
+
+    def _head(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as exc:
+            if exc.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def size(self, key):
+        head = self._head(key)
+        return head['ContentLength'] if head else None
+
+    def modified(self, key):
+        head = self._head(key)
+        return head['LastModified'].timestamp() if head else None
+
+    def touch(self, key):
+        """Copy the object onto itself so its LastModified is now; False if it does not exist."""
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket, Key=self._key(key),
+                CopySource={'Bucket': self.bucket, 'Key': self._key(key)},
+                MetadataDirective='REPLACE', **self._extra_args(key),
+            )
+        except ClientError as exc:
+            if exc.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def _extra_args(self, key):
+        return {'ContentType': mimetypes.guess_type(key)[0] or 'application/octet-stream'}
+
+    def put(self, local_path, key):
+        self.client.upload_file(local_path, self.bucket, self._key(key), ExtraArgs=self._extra_args(key))
+        os.remove(local_path)
+
+    def put_bytes(self, data, key):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, **self._extra_args(key))
+
+    def get_bytes(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body'].read()
+        except ClientError as exc:
+            if exc.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    @contextmanager
+    def local_copy(self, key):
+        with tempfile.TemporaryDirectory() as work:
+            path = os.path.join(work, os.path.basename(key))
+            self.client.download_file(self.bucket, self._key(key), path)
+            yield path
+
+    def move(self, key, new_key):
+        self.client.copy_object(
+            Bucket=self.bucket, Key=self._key(new_key),
+            CopySource={'Bucket': self.bucket, 'Key': self._key(key)},
+        )
+        self.delete(key)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def delete_prefix(self, prefix):
+        batch = []
+        for key, _, _ in self.list(prefix):
+            batch.append({'Key': self._key(key)})
+            if len(batch) == 1000:
+                self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': batch})
+                batch = []
+        if batch:
+            self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': batch})
+
+    def list(self, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get('Contents', []):
+                yield obj['Key'][len(self.prefix):], obj['Size'], obj['LastModified'].timestamp()
+
+    def presigned_url(self, key, expires):
+        """A GET URL for the bucket valid until `expires` (epoch seconds)."""
+        lifetime = max(60, min(7 * 24 * 3600, int(expires - time.time())))
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self._key(key)}, ExpiresIn=lifetime,
+        )
+
+
+def create_storage(config, static_folder):
+    if config.get('MEDIA_STORAGE', 'local') == 's3':
+        return S3Storage(
+            config['S3_BUCKET'],
+            prefix=config.get('S3_PREFIX') or '',
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region_name=config.get('S3_REGION'),
+            aws_access_key_id=config.get('S3_ACCESS_KEY_ID'),
+            aws_secret_access_key=config.get('S3_SECRET_ACCESS_KEY'),
+        )
+    return LocalStorage(static_folder)
+
+
+def get_storage():
+    """The configured backend for the current app (created on first use)."""
+    storage = current_app.extensions.get('media_storage')
+    if storage is None:
+        storage = create_storage(current_app.config, current_app.static_folder)
+        current_app.extensions['media_storage'] = storage
+    return storage
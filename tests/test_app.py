@@ -22,6 +22,11 @@ def app():
     test_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     test_app.config['TESTING'] = True
     test_app.config['WTF_CSRF_ENABLED'] = False
+    test_app.config['MEDIA_URL_TTL'] = 3600
+    test_app.config['PREFETCH_NEXT_MEDIA'] = True
+    test_app.config['PAGE_CACHE_TTL'] = 0
+    test_app.config['UPLOAD_CHUNK_SIZE'] = 8 * 1024 * 1024
+    test_app.config['MAX_UPLOAD_SIZE'] = 2 * 1024 * 1024 * 1024
     
     # Initialize extensions with test app
     test_db.init_app(test_app)
@@ -46,11 +51,16 @@ def app():
     from routes.admin import admin_bp
     from routes.game import game_bp
     from routes.public import public_bp
+    from routes.media import media_bp
     
     test_app.register_blueprint(auth_bp, url_prefix='/auth')
     test_app.register_blueprint(admin_bp, url_prefix='/admin')
     test_app.register_blueprint(game_bp, url_prefix='/game')
     test_app.register_blueprint(public_bp)
+    test_app.register_blueprint(media_bp, url_prefix='/media')
+
+    import assets
+    assets.init_app(test_app)
     
     yield test_app
     
@@ -0,0 +1,49 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+for name in ('SECRET_KEY', 'DB_USER', 'DB_PASSWORD', 'DB_HOST', 'DB_NAME'):
+    os.environ.setdefault(name, 'test')
+
+
+@pytest.fixture
+def app():
+    import config
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    original_uri = config.Config.SQLALCHEMY_DATABASE_URI
+    config.Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+    try:
+        from app import create_app, db
+        test_app = create_app()
+    finally:
+        config.Config.SQLALCHEMY_DATABASE_URI = original_uri
+    with test_app.app_context():
+        db.create_all()
+        yield test_app
+        db.session.remove()
+        db.drop_all()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+def test_requeue_stale_retries_with_backoff_then_fails(app):
+    from app import db
+    from jobs import JOB_LOCK_TIMEOUT, RETRY_DELAY, requeue_stale
+    from models import Job
+
+    now = datetime.utcnow()
+    lost = now - timedelta(seconds=JOB_LOCK_TIMEOUT + 1)
+    retried = Job(kind='process_media', status='running', attempts=2, max_attempts=3, locked_by='w', locked_at=lost)
+    exhausted = Job(kind='process_media', status='running', attempts=3, max_attempts=3, locked_by='w', locked_at=lost)
+    alive = Job(kind='process_media', status='running', attempts=1, max_attempts=3, locked_by='w', locked_at=now)
+    db.session.add_all([retried, exhausted, alive])
+    db.session.commit()
+
+    assert requeue_stale(now) == 2
+    db.session.expire_all()
+    assert retried.status == 'queued' and retried.locked_by is None
+    assert retried.run_after == now + timedelta(seconds=RETRY_DELAY * 2)
+    assert exhausted.status == 'failed' and exhausted.finished_at == now
+    assert alive.status == 'running'
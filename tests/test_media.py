@@ -0,0 +1,42 @@
+import pytest
+
+from media import strip_metadata
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def test_strip_metadata_drops_exif_and_applies_orientation(tmp_path):
+    path = str(tmp_path / 'photo.jpg')
+    exif = Image.Exif()
+    exif[0x0112] = 6           # Orientation: rotate 90° clockwise
+    exif[0x010F] = 'PhoneMaker'  # Make
+    Image.new('RGB', (40, 20), 'red').save(path, exif=exif)
+
+    assert strip_metadata(path, '.jpg')
+    with Image.open(path) as img:
+        assert img.size == (20, 40)
+        assert not img.getexif()
+    assert not strip_metadata(str(tmp_path / 'notes.pdf'), '.pdf')
+
+
+def test_signed_hls_scope_does_not_reach_other_uploads(tmp_path):
+    from flask import Flask
+
+    from routes.media import media_bp, media_src
+    from storage import LocalStorage
+
+    app = Flask(__name__, static_folder=str(tmp_path))
+    app.config.update(SECRET_KEY='test', MEDIA_URL_TTL=3600)
+    app.register_blueprint(media_bp, url_prefix='/media')
+    app.extensions['media_storage'] = LocalStorage(str(tmp_path))
+    for name in ('uploads/cas/ab/' + 'a' * 32 + '-hls/master.m3u8', 'uploads/cas/cd/' + 'c' * 32 + '.jpg'):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_bytes(b'x')
+
+    with app.test_request_context():
+        url = media_src('uploads/cas/ab/' + 'a' * 32 + '-hls/master.m3u8')
+    client = app.test_client()
+    assert client.get(url).status_code == 200
+    other = '../../cd/' + 'c' * 32 + '.jpg'
+    for escaped in (other, other.replace('..', '%2e%2e'), './' + 'x.ts', '/x.ts'):
+        assert client.get(url.replace('master.m3u8', escaped)).status_code == 404
@@ -0,0 +1,132 @@
+"""Statement budgets for the hot routes.
+
+Each test plays a request against the real app (SQLite) inside
+``instrumentation.track_queries`` and fails if the route issues more
+statements than its budget — e.g. when a loop starts lazy-loading per team.
+The seeded game has several teams so N+1 patterns show up as overruns.
+"""
+import os
+import tempfile
+
+import pytest
+
+for name in ('SECRET_KEY', 'DB_USER', 'DB_PASSWORD', 'DB_HOST', 'DB_NAME'):
+    os.environ.setdefault(name, 'test')
+
+from instrumentation import track_queries  # noqa: E402
+
+BUDGETS = {
+    'game.dashboard': 14,
+    'submit_answer (incorrect)': 6,
+    'submit_answer (correct)': 13,
+    'submit_answer (inline)': 28,
+    'get_clue': 13,
+    'scoreboard': 10,
+    'admin.dashboard': 14,
+}
+TEAMS = 6
+
+
+@pytest.fixture(scope='module')
+def app():
+    import config
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    original_uri = config.Config.SQLALCHEMY_DATABASE_URI
+    config.Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+    try:
+        from app import create_app, db
+        test_app = create_app()
+    finally:
+        config.Config.SQLALCHEMY_DATABASE_URI = original_uri
+    test_app.config.update(TESTING=True, PAGE_CACHE_TTL=0, PREFETCH_NEXT_MEDIA=False)
+
+    with test_app.app_context():
+        from models import Clue, GameConfig, Level, Question, Team, User
+        db.create_all()
+        admin = User(username='admin', email='admin@example.com', is_admin=True)
+        admin.set_password('pw')
+        db.session.add(admin)
+        db.session.add(GameConfig(num_teams=TEAMS, num_levels=2, questions_per_level=3,
+                                  teams_passing_per_level=2, clues_per_team=3, game_started=True))
+        levels = [Level(level_number=1, name='Level 1', teams_passing=2, is_active=True),
+                  Level(level_number=2, name='Level 2', teams_passing=0, is_final=True)]
+        db.session.add_all(levels)
+        db.session.flush()
+        for level in levels:
+            for number in (1, 2, 3):
+                question = Question(level_id=level.id, question_number=number, question_type='text',
+                                    question_text=f'<p>Q{number}</p>', answer='a')
+                db.session.add(question)
+                db.session.flush()
+                db.session.add_all([Clue(question_id=question.id, clue_text=f'c{n}', clue_order=n) for n in (1, 2)])
+        for index in range(TEAMS):
+            team = Team(name=f'T{index}', current_level=1, current_question=1)
+            db.session.add(team)
+            db.session.flush()
+            player = User(username=f'p{index}', email=f'p{index}@example.com', team_id=team.id)
+            player.set_password('pw')
+            db.session.add(player)
+        db.session.commit()
+
+    yield test_app
+
+    with test_app.app_context():
+        db.session.remove()
+        db.drop_all()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+def _client(app, username):
+    client = app.test_client()
+    client.post('/auth/login', data={'username': username, 'password': 'pw', 'login_key': ''})
+    return client
+
+
+def _first_question_id(app):
+    from models import Question
+    with app.app_context():
+        return Question.query.filter_by(question_number=1).order_by(Question.id).first().id
+
+
+def assert_budget(name, request):
+    with track_queries() as stats:
+        response = request()
+    assert response.status_code == 200, name
+    assert stats.count <= BUDGETS[name], f'{name}: {stats.count} statements (budget {BUDGETS[name]})'
+    return response
+
+
+def test_gameplay_routes_stay_within_budget(app):
+    client = _client(app, 'p0')
+    question_id = _first_question_id(app)
+    client.get('/game/dashboard')  # first visit builds the catalog and team progress
+
+    assert_budget('game.dashboard', lambda: client.get('/game/dashboard'))
+    assert_budget('submit_answer (incorrect)',
+                  lambda: client.post('/game/submit-answer', data={'question_id': question_id, 'answer': 'x'}))
+    assert_budget('get_clue', lambda: client.get(f'/game/get-clue/{question_id}'))
+    assert_budget('scoreboard', lambda: client.get('/game/scoreboard'))
+    response = assert_budget('submit_answer (correct)',
+                             lambda: client.post('/game/submit-answer', data={'question_id': question_id, 'answer': 'a'}))
+    assert response.get_json()['success']
+
+
+def test_inline_submit_returns_next_panel_within_budget(app):
+    client = _client(app, 'p1')
+    question_id = _first_question_id(app)
+    client.get('/game/dashboard')
+
+    response = assert_budget('submit_answer (inline)', lambda: client.post(
+        '/game/submit-answer', data={'question_id': question_id, 'answer': 'a', 'inline': '1'}))
+    payload = response.get_json()
+    assert payload['success']
+    assert payload['next']['state'] == 'play'
+    assert (payload['next']['level_number'], payload['next']['question_number']) == (1, 2)
+    assert payload['next']['question_id'] != question_id
+    assert 'Q2' in payload['next']['html']
+
+
+def test_admin_dashboard_stays_within_budget(app):
+    client = _client(app, 'admin')
+    assert_budget('admin.dashboard', lambda: client.get('/admin/dashboard'))
@@ -0,0 +1,51 @@
+from rich_text import content_hash, render_rich_text, rich_html
+
+
+def test_strips_scripts_and_event_handlers():
+    html = render_rich_text('<p onclick="x()">Hi<script>alert(1)</script></p>')
+    assert html == '<p>Hi</p>'
+
+
+def test_drops_javascript_urls_but_keeps_safe_ones():
+    html = render_rich_text('<a href="javascript:alert(1)">a</a><a href="/about">b</a>')
+    assert html == '<a>a</a><a href="/about">b</a>'
+
+
+def test_closes_unbalanced_tags():
+    assert render_rich_text('<div><p>open') == '<div><p>open</p></div>'
+    assert render_rich_text('text</div></div>') == 'text'
+
+
+def test_collapses_whitespace_outside_pre():
+    assert render_rich_text('<p>a \n\n  b</p><pre>x\n  y</pre>') == '<p>a b</p><pre>x\n  y</pre>'
+
+
+def test_content_hash_changes_with_input():
+    assert content_hash('a', None) == content_hash('a', '')
+    assert content_hash('a', 'b') != content_hash('ab', '')
+
+
+def test_keeps_summernote_video_embeds():
+    youtube = ('<p><iframe frameborder="0" src="//www.youtube.com/embed/dQw4w9WgXcQ" width="640" '
+               'height="360" class="note-video-clip" onload="x()"></iframe></p>')
+    html = render_rich_text(youtube)
+    assert html.startswith('<p><iframe src="https://www.youtube.com/embed/dQw4w9WgXcQ" '
+                           'class="note-video-clip" height="360" width="640" frameborder="0"')
+    assert html.endswith('></iframe></p>') and 'onload' not in html
+    assert render_rich_text(html) == html
+
+    vimeo = render_rich_text('<iframe src="//player.vimeo.com/video/76979871" width="640"></iframe>')
+    assert 'src="https://player.vimeo.com/video/76979871"' in vimeo
+
+
+def test_drops_other_iframes():
+    assert render_rich_text('<p>a<iframe src="https://evil.example/embed/">b</iframe></p>') == '<p>a</p>'
+    assert render_rich_text('<iframe src="javascript:alert(1)"/>ok') == 'ok'
+
+
+def test_empty_fragment_never_falls_back_to_raw():
+    raw = '<script>alert(1)</script><style>p{}</style><!-- x -->'
+    assert render_rich_text(raw) == ''
+    assert rich_html('', raw) == ''
+    assert rich_html(None, raw) == ''  # row not rendered yet: sanitized on the fly
+    assert rich_html(None, '<p onclick="x()">Hi</p>') == '<p>Hi</p>'
@@ -0,0 +1,22 @@
+import os
+
+for name in ('SECRET_KEY', 'DB_USER', 'DB_PASSWORD', 'DB_HOST', 'DB_NAME'):
+    os.environ.setdefault(name, 'test')
+
+from slow_log import redact, summarize  # noqa: E402
+
+
+def test_redact_replaces_literals():
+    statement = "SELECT * FROM teams\n WHERE name = 'O''Brien' AND current_level = 3 AND t1.x > -2.5"
+    assert redact(statement) == 'SELECT * FROM teams WHERE name = ? AND current_level = ? AND t1.x > ?'
+
+
+def test_summarize_groups_by_site_and_statement():
+    entries = [
+        {'kind': 'query', 'ms': 120, 'ts': 1, 'site': 'routes/game.py:10 in dashboard', 'sql': 'SELECT ?'},
+        {'kind': 'query', 'ms': 300, 'ts': 2, 'site': 'routes/game.py:10 in dashboard', 'sql': 'SELECT ?'},
+        {'kind': 'request', 'ms': 900, 'ts': 3, 'route': 'game.dashboard'},
+    ]
+    request_group, query_group = summarize(entries)
+    assert (request_group['kind'], request_group['where']) == ('request', 'game.dashboard')
+    assert (query_group['count'], query_group['max_ms'], query_group['last_ts']) == (2, 300, 2)
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from storage import LocalStorage, S3Storage
+
+
+def _roundtrip(storage, scratch):
+    src = os.path.join(scratch, 'upload')
+    with open(src, 'wb') as f:
+        f.write(b'hello')
+    storage.put(src, 'uploads/cas/ab/abc.jpg')
+    storage.put_bytes(b'#EXTM3U\n', 'uploads/cas/ab/abc-hls/master.m3u8')
+    storage.put_bytes(b'ts', 'uploads/cas/ab/abc-hls/360p_000.ts')
+
+    assert storage.exists('uploads/cas/ab/abc.jpg')
+    assert storage.size('uploads/cas/ab/abc.jpg') == 5
+    assert storage.get_bytes('uploads/cas/ab/abc-hls/master.m3u8') == b'#EXTM3U\n'
+    assert storage.get_bytes('uploads/missing.jpg') is None
+    assert storage.touch('uploads/cas/ab/abc.jpg') and not storage.touch('uploads/missing.jpg')
+    assert storage.modified('uploads/cas/ab/abc.jpg') > 0 and storage.modified('uploads/missing.jpg') is None
+    with storage.local_copy('uploads/cas/ab/abc.jpg') as path, open(path, 'rb') as f:
+        assert f.read() == b'hello'
+    assert sorted(key for key, _, _ in storage.list('uploads/cas/')) == [
+        'uploads/cas/ab/abc-hls/360p_000.ts',
+        'uploads/cas/ab/abc-hls/master.m3u8',
+        'uploads/cas/ab/abc.jpg',
+    ]
+
+    storage.delete_prefix('uploads/cas/ab/abc-hls/')
+    storage.delete('uploads/cas/ab/abc.jpg')
+    storage.delete('uploads/cas/ab/abc.jpg')  # already gone: no error
+    assert list(storage.list('uploads/')) == []
+
+
+def test_local_storage(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'static'))
+    _roundtrip(storage, str(tmp_path))
+    assert storage.presigned_url('uploads/cas/ab/abc.jpg', 0) is None
+
+
+def test_s3_storage(tmp_path):
+    boto3 = pytest.importorskip('boto3')
+    moto = pytest.importorskip('moto')
+    with moto.mock_aws():
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='media')
+        storage = S3Storage('media', prefix='hunt', region_name='us-east-1')
+        _roundtrip(storage, str(tmp_path))
+        url = storage.presigned_url('uploads/cas/ab/abc.jpg', 2_000_000_000)
+        assert 'hunt/uploads/cas/ab/abc.jpg' in url
@@ -0,0 +1,243 @@
+"""Sampled tracing spans around the phases of the hot gameplay routes.
+
+A fraction (``TRACE_SAMPLE_RATE``) of requests is traced. A traced request
+gets a root span, and code wraps its phases in :func:`span`::
+
+    with span('config.lookup'):
+        config = GameConfig.query.first()
+
+In an untraced request :func:`span` does nothing but one ``g`` lookup. Each
+finished trace is exported as one line of OTLP/JSON (the OpenTelemetry
+protocol's JSON encoding, as read by the collector's ``otlpjsonfile``
+receiver, Jaeger and Tempo importers), either to ``TRACE_FILE`` (default
+``logs/traces.jsonl``, rotated like the slow log) or, with
+``TRACE_EXPORT=memory``, to a ring buffer of the last ``TRACE_BUFFER_SIZE``
+traces in each worker. The trace ID of an incoming W3C ``traceparent`` header
+is kept, so spans from nginx or a load tester line up with ours.
+
+Admin → Performance breaks sampled ``game.dashboard`` and
+``game.submit_answer`` requests down by phase, including what the slowest 1%
+spent in each, and ``/admin/traces.json`` downloads the raw traces.
+"""
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+
+from slow_log import BACKUP_COUNT, MAX_BYTES, SharedRotatingFileHandler, read_entries
+
+exporter = logging.getLogger('treasure_hunt.traces')
+
+SERVICE_NAME = 'treasure-hunt'
+KIND_INTERNAL, KIND_SERVER = 1, 2
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+_buffer = deque(maxlen=1000)
+
+
+class _Trace:
+    __slots__ = ('trace_id', 'spans', 'stack')
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.spans = []
+        self.stack = []
+
+
+def _new_id(length):
+    return f'{random.getrandbits(length * 4):0{length}x}'
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+def _start(trace, name, kind, attributes, parent_id=None):
+    record = {
+        'traceId': trace.trace_id,
+        'spanId': _new_id(16),
+        'name': name,
+        'kind': kind,
+        'startTimeUnixNano': time.time_ns(),
+        'attributes': attributes,
+        '_started': time.perf_counter_ns(),
+    }
+    parent_id = trace.stack[-1]['spanId'] if trace.stack else parent_id
+    if parent_id:
+        record['parentSpanId'] = parent_id
+    trace.stack.append(record)
+    return record
+
+
+def _end(trace, record, error=None):
+    record['endTimeUnixNano'] = str(record['startTimeUnixNano'] + time.perf_counter_ns() - record.pop('_started'))
+    record['startTimeUnixNano'] = str(record['startTimeUnixNano'])
+    record['attributes'] = [_attribute(key, value) for key, value in record['attributes'].items()]
+    if error is not None:
+        record['status'] = {'code': STATUS_ERROR, 'message': repr(error)[:200]}
+    trace.stack.remove(record)
+    trace.spans.append(record)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time the block as a child span of the current one, if this request is traced."""
+    trace = g.get('trace')
+    if trace is None:
+        yield
+        return
+    record = _start(trace, name, KIND_INTERNAL, attributes)
+    try:
+        yield
+    except BaseException as exc:
+        _end(trace, record, exc)
+        raise
+    _end(trace, record)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Export
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _otlp(spans):
+    return {'resourceSpans': [{
+        'resource': {'attributes': [_attribute('service.name', SERVICE_NAME),
+                                    _attribute('process.pid', os.getpid())]},
+        'scopeSpans': [{'scope': {'name': 'treasure_hunt.tracing'}, 'spans': spans}],
+    }]}
+
+
+def _export(spans):
+    if current_app.config['TRACE_EXPORT'] == 'memory':
+        _buffer.append(_otlp(spans))
+    else:
+        exporter.info(json.dumps(_otlp(spans)))
+
+
+def recent_traces(limit=2000):
+    """Exported traces (OTLP/JSON documents), newest first."""
+    if current_app.config['TRACE_EXPORT'] == 'memory':
+        return list(reversed(_buffer))[:limit]
+    return read_entries(current_app.config['TRACE_FILE'], limit)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Phase breakdown for the admin Performance page
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def _duration_ms(record):
+    return (int(record['endTimeUnixNano']) - int(record['startTimeUnixNano'])) / 1e6
+
+
+def phase_summary(traces, endpoints):
+    """Per endpoint: request count, p50/p99 latency and, per phase, p50/p99 and the
+    mean time spent in it by requests at or above the p99 latency (all in ms).
+
+    Phases are the root span's direct children, so a nested span is counted
+    once, inside its parent's phase."""
+    requests = {endpoint: [] for endpoint in endpoints}   # endpoint → [(total, {phase: ms})]
+    for document in traces:
+        for resource in document.get('resourceSpans', []):
+            for scope in resource.get('scopeSpans', []):
+                spans = scope.get('spans', [])
+                root = next((s for s in spans if s.get('kind') == KIND_SERVER), None)
+                if root is None:
+                    continue
+                endpoint = next((a['value'].get('stringValue') for a in root.get('attributes', [])
+                                 if a['key'] == 'http.route'), None)
+                if endpoint not in requests:
+                    continue
+                phases = {}
+                for record in spans:
+                    if record.get('parentSpanId') == root['spanId']:
+                        phases[record['name']] = phases.get(record['name'], 0.0) + _duration_ms(record)
+                requests[endpoint].append((_duration_ms(root), phases))
+
+    summary = []
+    for endpoint, samples in requests.items():
+        if not samples:
+            continue
+        totals = [total for total, _ in samples]
+        p99 = _percentile(totals, 0.99)
+        slowest = [phases for total, phases in samples if total >= p99]
+        names = sorted({name for _, phases in samples for name in phases})
+        rows = [{
+            'name': name,
+            'p50': _percentile([phases.get(name, 0.0) for _, phases in samples], 0.5),
+            'p99': _percentile([phases.get(name, 0.0) for _, phases in samples], 0.99),
+            'slowest_mean': sum(phases.get(name, 0.0) for phases in slowest) / len(slowest),
+        } for name in names]
+        rows.sort(key=lambda row: row['slowest_mean'], reverse=True)
+        summary.append({'endpoint': endpoint, 'count': len(samples), 'p50': _percentile(totals, 0.5),
+                        'p99': p99, 'phases': rows})
+    return summary
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Request hooks
+# ─────────────────────────────────────────────────────────────────────────────
+
+def init_app(app):
+    app.config.setdefault('TRACE_SAMPLE_RATE', 0.0)
+    app.config.setdefault('TRACE_EXPORT', 'file')
+    app.config.setdefault('TRACE_BUFFER_SIZE', 1000)
+    app.config['TRACE_FILE'] = app.config.get('TRACE_FILE') or os.path.join(app.root_path, 'logs', 'traces.jsonl')
+
+    global _buffer
+    _buffer = deque(_buffer, maxlen=app.config['TRACE_BUFFER_SIZE'])
+    if app.config['TRACE_EXPORT'] != 'memory' and not exporter.handlers:
+        os.makedirs(os.path.dirname(app.config['TRACE_FILE']), exist_ok=True)
+        handler = SharedRotatingFileHandler(app.config['TRACE_FILE'], maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        exporter.addHandler(handler)
+        exporter.setLevel(logging.INFO)
+        exporter.propagate = False
+
+    @app.before_request
+    def start_trace():
+        rate = current_app.config['TRACE_SAMPLE_RATE']
+        if not rate or random.random() >= rate:
+            return
+        parent = _TRACEPARENT.match(request.headers.get('traceparent', ''))
+        trace = _Trace(parent.group(1) if parent else _new_id(32))
+        g.trace = trace
+        _start(trace, f'{request.method} {request.endpoint}', KIND_SERVER, {
+            'http.method': request.method,
+            'http.route': request.endpoint or 'unmatched',
+            'http.target': request.path,
+            'request.id': g.get('request_id') or '',
+        }, parent_id=parent.group(2) if parent else None)
+
+    @app.after_request
+    def record_status(response):
+        trace = g.get('trace')
+        if trace is not None and trace.stack:
+            trace.stack[0]['attributes']['http.status_code'] = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_trace(exc):
+        trace = g.pop('trace', None)
+        if trace is None:
+            return
+        while trace.stack:  # the root span, plus any left open by an exception
+            _end(trace, trace.stack[-1], exc)
+        _export(trace.spans)
@@ -0,0 +1,179 @@
+"""Transcode question videos into adaptive HLS renditions with a poster frame.
+
+Admins upload whatever their phone recorded — often 4K HEVC at 40+ Mbit/s —
+and every player used to download that original. The ``process_media`` job
+(jobs.py) runs uploaded videos through a local ``ffmpeg`` binary instead:
+
+* a few H.264/AAC renditions (360p, 720p, 1080p by the short edge, never
+  above the source) cut into 4-second HLS segments stored under
+  ``<stem>-hls/``, plus a ``master.m3u8`` listing them with their bandwidth
+  so the player can switch to the one the venue Wi-Fi sustains;
+* ``<stem>-poster.jpg`` from about one second in, shown before playback so
+  the page needs no video bytes until a player presses play.
+
+Container metadata (including GPS tags) is dropped from both. ffmpeg is
+optional: without it videos are stored and served exactly as uploaded.
+"""
+import json
+import os
+import shutil
+import subprocess
+
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.m4v', '.webm', '.mkv', '.avi', '.3gp'}
+
+# (short edge, video bitrate) ladder; renditions larger than the source are skipped.
+RENDITIONS = ((360, 800_000), (720, 2_800_000), (1080, 5_000_000))
+AUDIO_BITRATE = 128_000
+SEGMENT_SECONDS = 4
+POSTER_MAX_HEIGHT = 720
+
+# H.264 levels as (level_idc, max macroblocks/second, max macroblocks/frame).
+# Each rendition is encoded at the lowest one its size and frame rate fit, and
+# the master playlist advertises that level in its CODECS string.
+H264_LEVELS = (
+    (30, 40_500, 1_620), (31, 108_000, 3_600), (32, 216_000, 5_120), (40, 245_760, 8_192),
+    (42, 522_240, 8_704), (50, 589_824, 22_080), (51, 983_040, 36_864), (52, 2_073_600, 36_864),
+)
+
+
+def available():
+    return bool(shutil.which('ffmpeg') and shutil.which('ffprobe'))
+
+
+def is_video(media_url):
+    return os.path.splitext(media_url)[1].lower() in VIDEO_EXTENSIONS
+
+
+def _frame_rate(stream):
+    for key in ('avg_frame_rate', 'r_frame_rate'):
+        num, _, den = stream.get(key, '0/0').partition('/')
+        try:
+            if float(den or 1):
+                return float(num) / float(den or 1)
+        except ValueError:
+            continue
+    return 30.0
+
+
+def probe(path):
+    """``(width, height, duration, fps)`` as displayed, i.e. after rotation metadata."""
+    out = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_streams', '-show_format', '-of', 'json', path],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    info = json.loads(out)
+    stream = info['streams'][0]
+    width, height = int(stream['width']), int(stream['height'])
+
+    rotation = stream.get('tags', {}).get('rotate')
+    for side_data in stream.get('side_data_list', []):
+        rotation = side_data.get('rotation', rotation)
+    if rotation is not None and abs(int(float(rotation))) % 180 == 90:
+        width, height = height, width
+    return width, height, float(info.get('format', {}).get('duration') or 0), _frame_rate(stream)
+
+
+def h264_level(width, height, fps):
+    """Lowest H.264 level_idc (e.g. 40 for 4.0) that a `width`×`height` stream at `fps` fits."""
+    frame = -(-width // 16) * -(-height // 16)
+    for level, max_rate, max_frame in H264_LEVELS:
+        if frame <= max_frame and frame * fps <= max_rate:
+            return level
+    return H264_LEVELS[-1][0]
+
+
+def _run_ffmpeg(args, duration, on_progress):
+    """Run ffmpeg, feeding ``on_progress(fraction)`` from its -progress output."""
+    proc = subprocess.Popen(
+        ['ffmpeg', '-hide_banner', '-nostdin', '-y', '-v', 'error', '-progress', 'pipe:1', '-nostats', *args],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    reported = 0.0
+    for line in proc.stdout:
+        if not (on_progress and duration and line.startswith('out_time_us=')):
+            continue
+        try:
+            fraction = min(1.0, int(line.split('=', 1)[1]) / 1e6 / duration)
+        except ValueError:
+            continue
+        if fraction - reported >= 0.05:  # every 5% is plenty for the jobs page
+            reported = fraction
+            on_progress(fraction)
+    stderr = proc.stderr.read()
+    if proc.wait() != 0:
+        raise RuntimeError(f'ffmpeg failed: {stderr.strip()[-500:]}')
+
+
+def transcode(path, out_dir, progress=None):
+    """Write HLS renditions and a poster for the video at `path` into `out_dir`.
+
+    The output is ``hls/*.m3u8``, ``hls/*.ts`` and ``poster.jpg``; the caller
+    stores them as ``<stem>-hls/…`` and ``<stem>-poster.jpg``. Returns
+    ``(width, height, variants)`` where ``variants`` maps ``hls`` and
+    ``poster`` to ``[[size, name]]`` lists (names relative to `out_dir`) in
+    the same shape image variants use. `progress(done, total)` is called as
+    renditions are encoded.
+    """
+    width, height, duration, fps = probe(path)
+    hls_dir = os.path.join(out_dir, 'hls')
+    shutil.rmtree(hls_dir, ignore_errors=True)
+    os.makedirs(hls_dir)
+
+    short_edge = min(width, height)
+    ladder = [(edge, rate) for edge, rate in RENDITIONS if edge <= short_edge] \
+        or [(short_edge - short_edge % 2, RENDITIONS[0][1])]
+    master = ['#EXTM3U', '#EXT-X-VERSION:3']
+    for index, (edge, bitrate) in enumerate(ladder):
+        name = f'{edge}p'
+        # Scale the short edge so portrait phone clips get the same ladder.
+        if width >= height:
+            size, scale = (round(width * edge / height / 2) * 2, edge), f'scale=-2:{edge}'
+        else:
+            size, scale = (edge, round(height * edge / width / 2) * 2), f'scale={edge}:-2'
+
+        level = h264_level(*size, fps)
+
+        def report(fraction, index=index):
+            if progress:
+                progress(index + fraction, len(ladder) + 1)
+
+        _run_ffmpeg([
+            '-i', path,
+            '-map', '0:v:0', '-map', '0:a:0?', '-map_metadata', '-1',
+            '-vf', scale,
+            '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main',
+            '-level:v', f'{level // 10}.{level % 10}', '-pix_fmt', 'yuv420p',
+            '-b:v', str(bitrate), '-maxrate', str(int(bitrate * 1.07)), '-bufsize', str(bitrate * 2),
+            '-force_key_frames', f'expr:gte(t,n_forced*{SEGMENT_SECONDS})',
+            '-c:a', 'aac', '-b:a', str(AUDIO_BITRATE), '-ac', '2',
+            '-f', 'hls', '-hls_time', str(SEGMENT_SECONDS), '-hls_playlist_type', 'vod',
+            '-hls_segment_filename', os.path.join(hls_dir, f'{name}_%03d.ts'),
+            os.path.join(hls_dir, f'{name}.m3u8'),
+        ], duration, report)
+
+        master.append(
+            f'#EXT-X-STREAM-INF:BANDWIDTH={int((bitrate + AUDIO_BITRATE) * 1.1)},'
+            f'RESOLUTION={size[0]}x{size[1]},CODECS="avc1.4d40{level:02x},mp4a.40.2"'
+        )
+        master.append(f'{name}.m3u8')
+
+    with open(os.path.join(hls_dir, 'master.m3u8'), 'w') as f:
+        f.write('\n'.join(master) + '\n')
+
+    # An explicit size, rounded to even like the renditions, so the variants
+    # record the poster's real width.
+    poster_height = min(POSTER_MAX_HEIGHT, height)
+    poster_width = round(width * poster_height / height / 2) * 2
+    poster = os.path.join(out_dir, 'poster.jpg')
+    _run_ffmpeg([
+        '-ss', str(min(1.0, duration / 2)), '-i', path,
+        '-frames:v', '1', '-map_metadata', '-1',
+        '-vf', f'scale={poster_width}:{poster_height}', '-q:v', '3', poster,
+    ], None, None)
+    if progress:
+        progress(len(ladder) + 1, len(ladder) + 1)
+
+    return width, height, {
+        'hls': [[ladder[-1][0], 'hls/master.m3u8']],
+        'poster': [[poster_width, 'poster.jpg']],
+    }
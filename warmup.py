@@ -0,0 +1,120 @@
+"""Warm a freshly started worker before it takes traffic.
+
+The first requests a new worker serves used to pay for compiling every Jinja
+template they touch, configuring the SQLAlchemy mappers, connecting to
+MariaDB and building the question catalog, which is exactly when workers are
+restarted in the middle of an event. :func:`warm_up` does all of that up
+front. gunicorn.conf.py calls it from ``post_worker_init``, which runs in
+each worker before it accepts connections. ``flask warmup`` runs it by hand
+and prints the timings.
+
+Each step is timed and a failure only logs a warning: a worker that could
+not warm up still serves requests, just slower at first. /readyz reports
+whether this worker was warmed and how long it took.
+"""
+import logging
+import time
+
+import click
+from jinja2 import TemplateError
+from sqlalchemy.orm import configure_mappers
+
+from app import db
+
+logger = logging.getLogger('treasure_hunt.warmup')
+
+state = {'warmed': False, 'seconds': None, 'steps': {}}
+
+
+def compile_templates(app):
+    """Load every template into the Jinja cache; returns how many compiled."""
+    env = app.jinja_env
+    names = env.list_templates()
+    if env.cache is not None and len(names) > env.cache.capacity:
+        logger.warning('%d templates but a Jinja cache of %d; some will be recompiled', len(names),
+                       env.cache.capacity)
+    compiled = 0
+    for name in names:
+        try:
+            env.get_template(name)
+            compiled += 1
+        except TemplateError as exc:
+            logger.warning('Template %s did not compile: %s', name, exc)
+    return compiled
+
+
+def open_connections(app):
+    """Fill the pool with ``WARMUP_CONNECTIONS`` connections (at most pool_size)."""
+    pool = db.engine.pool
+    wanted = app.config['WARMUP_CONNECTIONS']
+    if hasattr(pool, 'size'):
+        wanted = min(wanted, pool.size())
+    connections = []
+    try:
+        for _ in range(wanted):
+            connection = db.engine.connect()
+            connection.execute(db.text('SELECT 1'))
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()  # back to the pool, still open
+    return len(connections)
+
+
+def prime_caches(app):
+    """Build the question catalog (while a game runs) and the public page route table."""
+    import page_cache
+    from catalog import get_catalog
+    from models import GameConfig
+
+    catalog = get_catalog(GameConfig.query.first())
+    if app.config['PAGE_CACHE_TTL']:
+        page_cache.page_routes()
+    db.session.remove()
+    return 'catalog' if catalog is not None else 'no game running'
+
+
+def configure_models(app):
+    """Resolve every relationship and backref now rather than on the first query."""
+    configure_mappers()
+    return 'configured'
+
+
+STEPS = (
+    ('templates', compile_templates),
+    ('mappers', configure_models),
+    ('connections', open_connections),
+    ('caches', prime_caches),
+)
+
+
+def warm_up(app):
+    """Run every warm-up step; returns ``{step: (seconds, result or error)}``."""
+    started = time.perf_counter()
+    steps = {}
+    with app.app_context():
+        for name, step in STEPS:
+            step_started = time.perf_counter()
+            try:
+                result = step(app)
+            except Exception as exc:  # noqa: BLE001 - never stop a worker from booting
+                logger.warning('Warm-up step %s failed: %s', name, exc)
+                result = f'failed: {exc}'
+                db.session.rollback()
+            steps[name] = (round(time.perf_counter() - step_started, 3), result)
+        db.session.remove()
+
+    seconds = round(time.perf_counter() - started, 3)
+    state.update(warmed=True, seconds=seconds, steps=steps, at=time.time())
+    logger.info('Worker warmed up in %.0f ms', seconds * 1000, extra={'steps': steps})
+    return steps
+
+
+def init_app(app):
+    app.config.setdefault('WARMUP_CONNECTIONS', 2)
+
+    @app.cli.command('warmup')
+    def warmup_command():
+        """Run the worker warm-up steps and print how long each took."""
+        for name, (seconds, result) in warm_up(app).items():
+            click.echo(f'{name:<12} {seconds * 1000:8.1f} ms  {result}')